@@ -1,39 +1,705 @@
+import array
 import ast
+import copy
 import ctypes
+import ctypes.util
+import functools
+import hashlib
+import importlib.machinery
+import importlib.util
 import inspect
 import os
-import subprocess
+import sys
+import sysconfig
+import threading
+import types
+from concurrent import futures
 
-from tree_to_code import dump_visitor
-# from tree_to_code import dump_dict # для PyPy
+from tree_to_code import dump_extension, dump_visitor
+from code_to_dll import cache, compiler, timing
+from code_to_dll import pch as pch_builder
+from code_to_dll import pgo as pgo_builder
+from code_to_dll.compiler import set_default_options
+from metastruct import aot
+from metastruct import profile as runtime_profile
+from tree_to_tree import linking
+from tree_to_tree import passes as optimisation_passes
 
-from typing import Callable, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from ctypes import LibraryLoader
 
+# numpy нужен только @vectorize и импортируется при первом использовании: импорт занимает десятки миллисекунд
+numpy = None
 
-def compile_dll(func: Callable) -> Tuple[ctypes.CDLL, dict]:
-    source = inspect.getsource(func)
-    ast_object = ast.parse(source)
+# типы элементов массивов numpy, для которых генерируются циклы @vectorize
+numpy_ctypes = {
+    "float64": "double",
+    "float32": "float",
+    "int64": "long long",
+    "int32": "int",
+    "bool": "bool"
+}
+numpy_dtypes = {
+    "double": "float64",
+    "int": "int32",
+    "bool": "bool"
+}
+
+
+def import_numpy() -> types.ModuleType:
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as numpy_module
+        except ImportError:
+            raise Exception("@vectorize requires numpy")
+        numpy = numpy_module
+    return numpy
+
+
+def prange(*args) -> range:
+    # в интерпретаторе prange работает как range, в скомпилированном коде цикл распараллеливается через OpenMP
+    return range(*args)
+
+
+def set_num_threads(num_threads: int) -> None:
+    # число потоков для параллельных циклов: переменная окружения действует на библиотеку OpenMP до её загрузки,
+    # omp_set_num_threads - на параллельные области, запускаемые из текущего потока
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    gomp_name = ctypes.util.find_library("gomp")
+    if gomp_name is not None:
+        ctypes.CDLL(gomp_name).omp_set_num_threads(num_threads)
+
+
+def parse_function(func: Callable) -> ast.Module:
+    with timing.phase("source"):
+        source = inspect.getsource(func)
+    with timing.phase("parse"):
+        return ast.parse(source)
+
+
+def compile_tree(ast_object: ast.Module, name: str, flags: Optional[List[str]] = None,
+                 pgo: Optional[List[tuple]] = None, internal: Set[str] = frozenset(),
+                 profile: bool = False, compiler_name: Optional[str] = None) -> Tuple[ctypes.CDLL, dict]:
     # print(ast.dump(ast_object, indent=4))
-    if not os.path.exists("cache"):
-        os.makedirs("cache")
-    cpp_filename = f"cache/{func.__name__}.cpp"
-    signatures = dump_visitor.dump_cpp_text(tree=ast_object, filename=cpp_filename)
-    o_filename = cpp_filename.replace(".cpp", ".o")
-    subprocess.run(["g++", "-O2", "-c", cpp_filename, "-o", o_filename])
-    # subprocess.run(["g++", "-c", cpp_filename, "-o", o_filename])
-    dll_filename = o_filename.replace(".o", ".dll")
-    subprocess.run(["g++", "-shared", o_filename, "-o", dll_filename])
-    os.remove(o_filename)
-    dll = LibraryLoader(ctypes.CDLL).LoadLibrary(dll_filename)
+    with timing.phase("codegen"):
+        text, signatures = dump_visitor.dump_cpp(ast_object, internal, profile)
+    exec_module, signatures = compile_text(text, signatures, name, flags, pgo, compiler_name)
+    if profile:
+        runtime_profile.attach(exec_module, signatures)
+    return exec_module, signatures
+
+
+def build_text(text: str, signatures: dict, name: str, flags: List[str],
+               pgo: Optional[List[tuple]] = None, compiler_name: Optional[str] = None) -> Tuple[str, dict]:
+    compiler_name = compiler.compiler_command(compiler_name)
+    if any(signature.get("openmp") for signature in signatures.values()):
+        flags = flags + ["-fopenmp"]
+    # библиотека, собранная по профилю, зависит от обучающих вызовов
+    key_flags = flags if pgo is None else flags + [f"-fprofile-use:{pgo_builder.samples_digest(pgo)}"]
+    source_key = cache.source_key(text, key_flags)
+    # заранее собранная библиотека из манифеста загружается без обращения к компилятору
+    with timing.phase("cache_lookup"):
+        prebuilt = aot.lookup(source_key)
+    if prebuilt is not None:
+        dll_filename, signatures = prebuilt
+        record_build_stats(text, flags, True, dll_filename, compiler_name)
+        return dll_filename, signatures
+    with timing.phase("cache_lookup"):
+        key = cache.cache_key(text, compiler.compiler_identity(compiler_name), key_flags)
+        cpp_filename, dll_filename, meta_filename = cache.entry_paths(name, key)
+        cache_hit = cache.is_complete(dll_filename, meta_filename)
+    if not cache_hit:
+        with cache.entry_lock(dll_filename):
+            # пока поток ждал блокировку, библиотеку мог собрать другой процесс
+            cache_hit = cache.is_complete(dll_filename, meta_filename)
+            if not cache_hit:
+                # библиотека собирается под временным именем и публикуется переименованием, поэтому другие
+                # процессы не загрузят недописанный файл; имя без pid, чтобы профиль PGO находился при пересборке
+                base, ext = os.path.splitext(dll_filename)
+                temp_dll_filename = f"{base}.tmp{ext}"
+                if pgo is None:
+                    pch_builder.build_pch_library(text, temp_dll_filename, flags, compiler_name)
+                else:
+                    # для PGO нужен файл исходного кода: по имени объектного файла находится профиль
+                    cache.write_atomic(cpp_filename, text)
+                    pgo_builder.build_pgo_library(cpp_filename, temp_dll_filename, flags, name, signatures[name],
+                                                  pgo, compiler_name)
+                os.replace(temp_dll_filename, dll_filename)
+                cache.store_signatures(meta_filename, signatures)
+        if not cache_hit:
+            cache.prune(keep=os.path.basename(os.path.splitext(dll_filename)[0]))
+    if cache_hit:
+        signatures = cache.load_signatures(meta_filename)
+        cache.touch(meta_filename)
+    aot.record(source_key, name, dll_filename, signatures, flags)
+    record_build_stats(text, flags, cache_hit, dll_filename, compiler_name)
+    return dll_filename, signatures
+
+
+def record_build_stats(text: str, flags: List[str], cache_hit: bool, dll_filename: str, compiler_name: str) -> None:
+    stats = timing.current()
+    if stats is not None:
+        stats.cache_hit = cache_hit
+        stats.compiler = compiler_name
+        stats.flags = flags
+        stats.source_bytes = len(text.encode("utf-8"))
+        stats.library_bytes = os.path.getsize(dll_filename)
+        stats.library = dll_filename
+
+
+def compile_text(text: str, signatures: dict, name: str, flags: Optional[List[str]] = None,
+                 pgo: Optional[List[tuple]] = None, compiler_name: Optional[str] = None) -> Tuple[ctypes.CDLL, dict]:
+    if flags is None:
+        flags = compiler.compiler_flags()
+    dll_filename, signatures = build_text(text, signatures, name, flags, pgo, compiler_name)
+    with timing.phase("load"):
+        dll = LibraryLoader(ctypes.CDLL).LoadLibrary(dll_filename)
     return dll, signatures
 
 
-def jit(func: Callable) -> Callable:
-    exec_module, signatures = compile_dll(func)
-    name = func.__name__
+def compile_dll(func: Callable) -> Tuple[ctypes.CDLL, dict]:
+    with timing.recording(func.__name__) as stats:
+        dll, signatures = compile_tree(parse_function(func), func.__name__)
+    dll.compile_stats = stats
+    return dll, signatures
+
+
+def attach_stats(jit_func: Callable, stats: timing.CompileStats) -> None:
+    jit_func.compile_stats = stats
+
+
+def get_stats(jit_func: Callable) -> Optional[timing.CompileStats]:
+    return getattr(jit_func, "compile_stats", None)
+
+
+def get_jit_func(exec_module: ctypes.CDLL, signatures: dict, name: str) -> Callable:
     jit_func = exec_module[name]
     jit_func.argtypes = signatures[name]["argtypes"]
     jit_func.restype = signatures[name]["restype"]
+    if hasattr(exec_module, f"{name}__batch"):
+        batch_func = exec_module[f"{name}__batch"]
+        batch_func.argtypes = [ctypes.c_longlong] + [ctypes.c_void_p] * (len(jit_func.argtypes) + 1)
+        batch_func.restype = None
+        jit_func.parallel_map = functools.partial(
+            parallel_map_batch, batch_func, signatures[name]["cpp_argtypes"], signatures[name]["cpp_restype"]
+        )
+    else:
+        jit_func.parallel_map = functools.partial(parallel_map_unsupported, name)
+    return jit_func
+
+
+# коды типов array.array для аргументов и результатов пакетных вызовов
+array_typecodes = {
+    "int": "i",
+    "double": "d",
+    "bool": "b"
+}
+
+
+def parallel_map_batch(batch_func: Callable, argtypes: List[str], restype: str, iterable: Iterable,
+                       workers: Optional[int] = None, chunksize: Optional[int] = None) -> list:
+    items = list(iterable)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(items) // (workers * 4)))
+    if not items:
+        return []
+    # как и map, функция одного аргумента принимает последовательность значений без упаковки в кортежи
+    columns = list(zip(*items)) if isinstance(items[0], tuple) else [items]
+    if len(columns) != len(argtypes):
+        raise Exception(f"expected {len(argtypes)} arguments per item")
+
+    def run_chunk(start: int) -> array.array:
+        arrays = [array.array(array_typecodes[arg_type], column[start:start + chunksize])
+                  for arg_type, column in zip(argtypes, columns)]
+        size = len(arrays[0]) if arrays else min(chunksize, len(items) - start)
+        res = array.array(array_typecodes[restype], [0]) * size
+        pointers = [array_pointer(elem) for elem in arrays + [res]]
+        # ctypes отпускает GIL на время вызова, поэтому порции выполняются параллельно
+        batch_func(size, *pointers)
+        return res
+
+    res = []
+    with futures.ThreadPoolExecutor(workers, thread_name_prefix="metastruct-map") as executor:
+        for chunk in executor.map(run_chunk, range(0, len(items), chunksize)):
+            res.extend(map(bool, chunk) if restype == "bool" else chunk)
+    return res
+
+
+def array_pointer(elem: array.array) -> int:
+    return elem.buffer_info()[0]
+
+
+def parallel_map(func: Callable, iterable: Iterable, workers: Optional[int] = None,
+                 chunksize: Optional[int] = None) -> list:
+    batch = getattr(func, "parallel_map", functools.partial(parallel_map_unsupported, getattr(func, "__name__", func)))
+    return batch(iterable, workers=workers, chunksize=chunksize)
+
+
+def parallel_map_unsupported(name: str, iterable: Iterable, workers: Optional[int] = None,
+                             chunksize: Optional[int] = None) -> list:
+    # пакетная функция генерируется только для backend="ctypes" и скалярных аргументов
+    raise Exception(f"parallel_map unsupported for {name}: requires backend=\"ctypes\" and scalar arguments")
+
+
+def load_extension(ast_object: ast.Module, name: str, flags: List[str],
+                   pgo: Optional[List[tuple]] = None, internal: Set[str] = frozenset(),
+                   profile: bool = False, compiler_name: Optional[str] = None) -> Callable:
+    # функция оборачивается в модуль расширения CPython с METH_FASTCALL вместо вызова через ctypes
+    with timing.phase("codegen"):
+        text, signatures = dump_visitor.dump_cpp(ast_object, internal, profile)
+        module_name = f"_metastruct_{name}_{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+        extension_text = dump_extension.dump_extension(module_name, text, signatures)
+    flags = flags + ["-I", sysconfig.get_paths()["include"]]
+    dll_filename, _ = build_text(extension_text, signatures, name, flags, pgo, compiler_name)
+    with timing.phase("load"):
+        loader = importlib.machinery.ExtensionFileLoader(module_name, dll_filename)
+        spec = importlib.util.spec_from_file_location(module_name, dll_filename, loader=loader)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    if profile:
+        # счётчики читаются через ctypes из той же загруженной библиотеки
+        runtime_profile.attach(ctypes.CDLL(dll_filename), signatures)
+    jit_func = getattr(module, name)
+    jit_func.parallel_map = functools.partial(parallel_map_unsupported, name)
     return jit_func
 
+
+def load_jit_tree(ast_object: ast.Module, name: str, backend: str = "ctypes", pgo: Optional[List[tuple]] = None,
+                  passes: Optional[Dict[str, bool]] | bool = None, namespace: Optional[dict] = None,
+                  profile: Optional[bool] = None, compiler_name: Optional[str] = None,
+                  **compile_options) -> Callable:
+    with timing.phase("passes"):
+        ast_object = optimisation_passes.optimise(ast_object, passes)
+    # вызовы других скомпилированных функций из пространства имён модуля становятся прямыми вызовами в C++
+    with timing.phase("link"):
+        ast_object, internal = linking.link(ast_object, namespace or {})
+    flags = compiler.compiler_flags(**compile_options)
+    profile = runtime_profile.enabled(profile)
+    match backend:
+        case "ctypes":
+            exec_module, signatures = compile_tree(ast_object, name, flags, pgo, internal, profile, compiler_name)
+            return get_jit_func(exec_module, signatures, name)
+        case "cpython":
+            return load_extension(ast_object, name, flags, pgo, internal, profile, compiler_name)
+        case _:
+            raise Exception(f"unsupported backend {backend}")
+
+
+def load_jit_func(func: Callable, tier: Optional[str] = None, **options) -> Callable:
+    with timing.recording(func.__name__, options.get("backend", "ctypes"), tier) as stats:
+        jit_func = load_jit_tree(parse_function(func), func.__name__, namespace=func.__globals__, **options)
+    attach_stats(jit_func, stats)
+    linking.register(jit_func, func, options.get("passes"))
+    return jit_func
+
+
+class LazyJit:
+    def __init__(self, func: Callable, **options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.options = options
+        self.jit_func = None
+        self.compile_stats = None
+        # первый вызов из нескольких потоков компилирует функцию один раз, остальные ждут
+        self.compile_lock = threading.Lock()
+        linking.register(self, func, options.get("passes"))
+
+    def compile(self) -> Callable:
+        if self.jit_func is None:
+            with self.compile_lock:
+                if self.jit_func is None:
+                    self.bind(load_jit_func(self.py_func, **self.options))
+        return self.jit_func
+
+    def bind(self, jit_func: Callable) -> None:
+        self.jit_func = jit_func
+        self.compile_stats = get_stats(jit_func)
+        # после компиляции имя в модуле указывает прямо на функцию из dll
+        namespace = self.py_func.__globals__
+        if namespace.get(self.__name__) is self:
+            namespace[self.__name__] = jit_func
+
+    def __call__(self, *args):
+        return self.compile()(*args)
+
+    def parallel_map(self, iterable: Iterable, workers: Optional[int] = None, chunksize: Optional[int] = None) -> list:
+        return parallel_map(self.compile(), iterable, workers, chunksize)
+
+
+compile_executor = futures.ThreadPoolExecutor(thread_name_prefix="metastruct-compile")
+background_compilations: List[futures.Future] = []
+
+
+class BackgroundJit:
+    def __init__(self, func: Callable, **options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.options = options
+        self.jit_func = None
+        self.interpreted_calls = 0
+        self.call = self.interpret
+        self.compile_stats = None
+        linking.register(self, func, options.get("passes"))
+        self.future = compile_executor.submit(self.compile)
+        background_compilations.append(self.future)
+
+    def compile(self) -> Callable:
+        self.jit_func = load_jit_func(self.py_func, **self.options)
+        self.compile_stats = get_stats(self.jit_func)
+        # подмена одной операцией присваивания, вызовы из других потоков видят либо старую, либо новую функцию
+        self.call = self.jit_func
+        return self.jit_func
+
+    def interpret(self, *args):
+        self.interpreted_calls += 1
+        return self.py_func(*args)
+
+    def wait_compiled(self, timeout: Optional[float] = None) -> Callable:
+        return self.future.result(timeout)
+
+    def parallel_map(self, iterable: Iterable, workers: Optional[int] = None, chunksize: Optional[int] = None) -> list:
+        return parallel_map(self.wait_compiled(), iterable, workers, chunksize)
+
+    def __call__(self, *args):
+        return self.call(*args)
+
+
+class FastStartJit(BackgroundJit):
+    def __init__(self, func: Callable, **options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.options = options
+        self.jit_func = None
+        self.compile_stats = None
+        # время сборки по уровням: fast - быстрая сборка без оптимизаций, optimised - полная сборка
+        self.tier_stats: Dict[str, timing.CompileStats] = {}
+        linking.register(self, func, options.get("passes"))
+        # профиль PGO нужен только полной сборке
+        fast_options = {option: value for option, value in options.items() if option != "pgo"}
+        self.fast_func = load_jit_func(func, "fast", **compiler.fast_tier_options(**fast_options))
+        self.tier_stats["fast"] = get_stats(self.fast_func)
+        self.call = self.fast_func
+        self.future = compile_executor.submit(self.compile)
+        background_compilations.append(self.future)
+
+    def compile(self) -> Callable:
+        self.jit_func = load_jit_func(self.py_func, "optimised", **self.options)
+        self.compile_stats = get_stats(self.jit_func)
+        self.tier_stats["optimised"] = self.compile_stats
+        self.call = self.jit_func
+        return self.jit_func
+
+    def parallel_map(self, iterable: Iterable, workers: Optional[int] = None, chunksize: Optional[int] = None) -> list:
+        return parallel_map(self.call, iterable, workers, chunksize)
+
+
+# число вызовов в интерпретаторе, после которого функция с @jit(tiered=True) компилируется
+tier_threshold = int(os.environ.get("METASTRUCT_TIER_THRESHOLD", "1000"))
+tier_lock = threading.Lock()
+
+
+class BackEdgeCounter(ast.NodeTransformer):
+    # в начало тела каждого цикла добавляется `_tier.back_edges += 1`
+    def visit_loop(self, node: ast.While | ast.For) -> ast.AST:
+        self.generic_visit(node)
+        node.body.insert(0, ast.parse("_tier.back_edges += 1").body[0])
+        return node
+
+    visit_While = visit_loop
+    visit_For = visit_loop
+
+
+def instrument_loops(func: Callable, tier: "TieredJit") -> Callable:
+    tree = parse_function(func)
+    func_def = next(elem for elem in tree.body if isinstance(elem, ast.FunctionDef))
+    func_def.decorator_list = []
+    BackEdgeCounter().visit(func_def)
+    # функция создаётся внутри замыкания, чтобы счётчик был доступен без новых глобальных имён в модуле
+    factory = ast.parse("def _make_instrumented(_tier):\n    pass").body[0]
+    factory.body = [func_def, ast.Return(value=ast.Name(id=func_def.name, ctx=ast.Load()))]
+    module = ast.fix_missing_locations(ast.Module(body=[factory], type_ignores=[]))
+    ast.increment_lineno(module, func.__code__.co_firstlineno - 1)
+    namespace = {}
+    exec(compile(module, inspect.getsourcefile(func), "exec"), func.__globals__, namespace)
+    return namespace["_make_instrumented"](tier)
+
+
+class TieredJit(BackgroundJit):
+    def __init__(self, func: Callable, threshold: Optional[int] = None, loop_threshold: Optional[int] = None,
+                 **options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.options = options
+        self.jit_func = None
+        self.compile_stats = None
+        self.threshold = tier_threshold if threshold is None else threshold
+        # необязательный счётчик итераций циклов: функция с долгими циклами становится горячей раньше
+        self.loop_threshold = loop_threshold
+        self.interpreted_calls = 0
+        self.back_edges = 0
+        self.future: Optional[futures.Future] = None
+        self.interpreted = func if loop_threshold is None else instrument_loops(func, self)
+        self.call = self.interpret
+        linking.register(self, func, options.get("passes"))
+
+    def interpret(self, *args):
+        self.interpreted_calls += 1
+        res = self.interpreted(*args)
+        # проверка после вызова учитывает и итерации циклов, выполненные в нём
+        if self.future is None and (self.interpreted_calls >= self.threshold or
+                                    self.loop_threshold is not None and self.back_edges >= self.loop_threshold):
+            self.promote()
+        return res
+
+    def promote(self) -> futures.Future:
+        # компиляция ставится в очередь один раз, до её окончания вызовы выполняются интерпретатором
+        with tier_lock:
+            if self.future is None:
+                self.future = compile_executor.submit(self.compile)
+                background_compilations.append(self.future)
+        return self.future
+
+    def wait_compiled(self, timeout: Optional[float] = None) -> Callable:
+        return self.promote().result(timeout)
+
+
+def wait_compiled(timeout: Optional[float] = None) -> None:
+    pending = list(background_compilations)
+    futures.wait(pending, timeout)
+    for future in pending:
+        if future.done():
+            background_compilations.remove(future)
+            future.result()
+
+
+# типы аргументов, для которых компилируются специализированные варианты функции
+specialized_types = {int: "int", float: "float", bool: "bool"}
+
+
+class SpecializingJit:
+    def __init__(self, func: Callable, signatures: Optional[List[Tuple[type, ...]]] = None, **options):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.options = options
+        self.tree = parse_function(func)
+        self.variants: Dict[Tuple[type, ...], Callable] = {}
+        self.compile_stats: Dict[Tuple[type, ...], timing.CompileStats] = {}
+        self.compile_lock = threading.Lock()
+        linking.register(self, func, options.get("passes"))
+        for arg_types in signatures or []:
+            self.compile(tuple(arg_types))
+
+    def compile(self, arg_types: Tuple[type, ...]) -> Callable:
+        with self.compile_lock:
+            variant = self.variants.get(arg_types)
+            if variant is None:
+                variant = self.compile_variant(arg_types)
+        return variant
+
+    def compile_variant(self, arg_types: Tuple[type, ...]) -> Callable:
+        tree = copy.deepcopy(self.tree)
+        func_def = next(elem for elem in tree.body if isinstance(elem, ast.FunctionDef))
+        if len(arg_types) != len(func_def.args.args):
+            raise Exception(f"{self.__name__}() takes {len(func_def.args.args)} arguments")
+        for arg, arg_type in zip(func_def.args.args, arg_types):
+            # аргументы других типов, например буферы, сохраняют аннотацию из исходного кода
+            if arg_type in specialized_types:
+                arg.annotation = ast.Name(id=specialized_types[arg_type])
+        if func_def.returns is None:
+            func_def.returns = ast.Name(id="float" if float in arg_types else "int")
+        with timing.recording(self.__name__, self.options.get("backend", "ctypes")) as stats:
+            variant = load_jit_tree(tree, self.__name__, namespace=self.py_func.__globals__, **self.options)
+        attach_stats(variant, stats)
+        self.compile_stats[arg_types] = stats
+        self.variants[arg_types] = variant
+        return variant
+
+    def __call__(self, *args):
+        arg_types = tuple(map(type, args))
+        variant = self.variants.get(arg_types)
+        if variant is None:
+            variant = self.compile(arg_types)
+        return variant(*args)
+
+    def parallel_map(self, iterable: Iterable, workers: Optional[int] = None, chunksize: Optional[int] = None) -> list:
+        # вариант выбирается по типам аргументов первого элемента
+        items = list(iterable)
+        if not items:
+            return []
+        arg_types = tuple(map(type, items[0] if isinstance(items[0], tuple) else (items[0],)))
+        variant = self.variants.get(arg_types)
+        if variant is None:
+            variant = self.compile(arg_types)
+        return parallel_map(variant, items, workers, chunksize)
+
+
+def jit_module(module: types.ModuleType | str, passes: Optional[Dict[str, bool]] | bool = None,
+               profile: Optional[bool] = None, compiler_name: Optional[str] = None,
+               **compile_options) -> Dict[str, Callable]:
+    if isinstance(module, str):
+        module = sys.modules[module]
+    # в одну библиотеку собираются ещё не скомпилированные функции с @jit(lazy=True); функции с PGO
+    # обучаются по отдельности и компилируются при первом вызове
+    lazy_funcs = [
+        value for value in vars(module).values()
+        if isinstance(value, LazyJit) and value.jit_func is None and value.__module__ == module.__name__
+        and value.options.get("backend", "ctypes") == "ctypes" and value.options.get("pgo") is None
+    ]
+    # параметры функции важнее параметров jit_module, функции с разными параметрами попадают в разные библиотеки
+    defaults = {"passes": passes, "profile": profile, "compiler_name": compiler_name, **compile_options}
+    groups: Dict[str, Tuple[dict, List[LazyJit]]] = {}
+    for lazy in lazy_funcs:
+        options = dict(defaults)
+        options.update((option, value) for option, value in lazy.options.items()
+                       if option != "backend" and value is not None)
+        groups.setdefault(repr(sorted(options.items())), (options, []))[1].append(lazy)
+    jit_funcs = {}
+    for options, group in groups.values():
+        jit_funcs.update(compile_module_group(module, group, **options))
+    return jit_funcs
+
+
+def compile_module_group(module: types.ModuleType, lazy_funcs: List[LazyJit],
+                         passes: Optional[Dict[str, bool]] | bool = None, profile: Optional[bool] = None,
+                         compiler_name: Optional[str] = None, **compile_options) -> Dict[str, Callable]:
+    # статистика компиляции общая для всех функций библиотеки
+    with timing.recording(module.__name__) as stats:
+        body = [stmt for lazy in lazy_funcs for stmt in parse_function(lazy.py_func).body]
+        with timing.phase("passes"):
+            ast_object = optimisation_passes.optimise(ast.Module(body=body, type_ignores=[]), passes)
+        with timing.phase("link"):
+            ast_object, internal = linking.link(ast_object, vars(module))
+        flags = compiler.compiler_flags(**compile_options)
+        exec_module, signatures = compile_tree(ast_object, module.__name__, flags, internal=internal,
+                                               profile=runtime_profile.enabled(profile), compiler_name=compiler_name)
+    jit_funcs = {}
+    for lazy in lazy_funcs:
+        jit_func = get_jit_func(exec_module, signatures, lazy.__name__)
+        attach_stats(jit_func, stats)
+        # функция из библиотеки заменяет LazyJit в модуле, поэтому регистрируется для вызовов из других функций
+        linking.register(jit_func, lazy.py_func, lazy.options.get("passes"))
+        lazy.bind(jit_func)
+        jit_funcs[lazy.__name__] = lazy.jit_func
+    return jit_funcs
+
+
+class Vectorize:
+    def __init__(self, func: Callable, passes: Optional[Dict[str, bool]] | bool = None,
+                 compiler_name: Optional[str] = None, **compile_options):
+        import_numpy()
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.flags = compiler.compiler_flags(**compile_options)
+        self.compiler_name = compiler_name
+        tree = optimisation_passes.optimise(parse_function(func), passes)
+        self.tree, internal = linking.link(tree, func.__globals__)
+        self.scalar_text, self.signatures = dump_visitor.dump_cpp(self.tree, internal)
+        self.signature = self.signatures[func.__name__]
+        self.loops = {}
+        self.compile_stats: Dict[Tuple[Tuple[str, ...], str], timing.CompileStats] = {}
+        self.compile_lock = threading.Lock()
+        linking.register(self, func, passes)
+
+    def get_loop(self, in_types: Tuple[str, ...], out_type: str) -> Callable:
+        loop = self.loops.get((in_types, out_type))
+        if loop is not None:
+            return loop
+        with self.compile_lock:
+            return self.loops.get((in_types, out_type)) or self.compile_loop(in_types, out_type)
+
+    def compile_loop(self, in_types: Tuple[str, ...], out_type: str) -> Callable:
+        name = self.__name__
+        loop_name = f"{name}__loop"
+        with timing.recording(loop_name) as stats:
+            with timing.phase("codegen"):
+                text = self.scalar_text + dump_visitor.dump_loop(name, loop_name, list(in_types), out_type)
+            exec_module, _ = compile_text(text, self.signatures, name, self.flags, compiler_name=self.compiler_name)
+        self.compile_stats[(in_types, out_type)] = stats
+        loop = exec_module[loop_name]
+        loop.argtypes = [
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.c_longlong),
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.POINTER(ctypes.c_longlong)
+        ]
+        loop.restype = None
+        self.loops[(in_types, out_type)] = loop
+        return loop
+
+    def __call__(self, *args, out=None):
+        if len(args) != len(self.signature["argtypes"]):
+            raise Exception(f"{self.__name__}() takes {len(self.signature['argtypes'])} arguments")
+        arrays = list(map(as_supported_array, args))
+        shape = numpy.broadcast_shapes(*(array.shape for array in arrays))
+        if out is None:
+            out = numpy.empty(shape, dtype=numpy_dtypes[self.signature["cpp_restype"]])
+        elif out.shape != shape or out.dtype.name not in numpy_ctypes or not out.flags.writeable:
+            raise Exception(f"unsupported out array {out.dtype}{out.shape} for shape {shape}")
+        # скаляр обрабатывается как массив из одного элемента
+        loop_shape = shape or (1,)
+        operands = [numpy.broadcast_to(array, loop_shape) for array in arrays] + [out.reshape(loop_shape)]
+        loop = self.get_loop(
+            tuple(numpy_ctypes[array.dtype.name] for array in arrays),
+            numpy_ctypes[out.dtype.name]
+        )
+        ndim = len(loop_shape)
+        loop(
+            ndim,
+            (ctypes.c_longlong * ndim)(*loop_shape),
+            (ctypes.c_void_p * len(operands))(*(operand.ctypes.data for operand in operands)),
+            (ctypes.c_longlong * (ndim * len(operands)))(*(step for operand in operands for step in operand.strides))
+        )
+        return out if shape else out[()]
+
+
+def as_supported_array(value) -> "numpy.ndarray":
+    array = import_numpy().asarray(value)
+    if array.dtype.name not in numpy_ctypes:
+        array = array.astype(numpy.float64 if array.dtype.kind in "fc" else numpy.int64)
+    return array
+
+
+def vectorize(func: Optional[Callable] = None, **compile_options) -> Callable:
+    if func is None:
+        return functools.partial(vectorize, **compile_options)
+    return Vectorize(func, **compile_options)
+
+
+def jit(func: Optional[Callable] = None, *, lazy: bool = False, background: bool = False, tiered: bool = False,
+        fast_start: bool = False, **options) -> Callable:
+    if func is None:
+        return functools.partial(jit, lazy=lazy, background=background, tiered=tiered, fast_start=fast_start,
+                                 **options)
+    if options.pop("specialize", False) or "signatures" in options:
+        return SpecializingJit(func, **options)
+    if tiered:
+        return TieredJit(func, **options)
+    if fast_start:
+        return FastStartJit(func, **options)
+    if background:
+        return BackgroundJit(func, **options)
+    if lazy:
+        return LazyJit(func, **options)
+    return load_jit_func(func, **options)
+
+
+def train(func: Callable, sample_inputs: List[tuple], **options) -> Callable:
+    # сборка с -fprofile-generate, обучающие вызовы и пересборка с -fprofile-use; профиль хранится в кэше
+    entry = linking.lookup(func)
+    if entry is not None:
+        # функция уже собрана через @jit: берём исходную python-функцию из реестра
+        py_func, passes = entry
+        options.setdefault("passes", passes)
+    else:
+        py_func = getattr(func, "py_func", func)
+    trained = load_jit_func(py_func, pgo=[tuple(args) for args in sample_inputs], **options)
+    namespace = py_func.__globals__
+    if namespace.get(py_func.__name__) is func:
+        namespace[py_func.__name__] = trained
+    return trained
+
+
+jit.train = train
@@ -0,0 +1,68 @@
+import argparse
+import sys
+
+from benchmark import compare, runner
+from benchmark.registry import kernels
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def print_result(result: dict) -> None:
+    name = f"{result['kernel']}{tuple(result['params'])}"
+    if "error" in result:
+        print(f"{name:<24} {result['implementation']:<12} error: {result['error']}")
+        return
+    print(f"{name:<24} {result['implementation']:<12} median {format_time(result['median_s']):>10}  "
+          f"p95 {format_time(result['p95_s']):>10}  compile {format_time(result['compile_s']):>10}")
+
+
+def print_row(row: dict) -> None:
+    name = f"{row['kernel']}{tuple(row['params'])}"
+    details = ""
+    if "ratio" in row:
+        details = f"{format_time(row['base_median_s'])} -> {format_time(row['median_s'])} (x{row['ratio']:.2f})"
+    print(f"{name:<24} {row['implementation']:<12} {row['status']:<18} {details}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="замерить функции и сохранить результаты в JSON")
+    run_parser.add_argument("-k", "--kernels", nargs="+", help="функции для замеров, по умолчанию все")
+    run_parser.add_argument("-i", "--implementations", nargs="+", choices=list(runner.implementations),
+                            help="реализации для сравнения, по умолчанию все доступные")
+    run_parser.add_argument("-o", "--output", help="файл для результатов")
+    run_parser.add_argument("--repeat", type=int, default=15, help="число замеров")
+    run_parser.add_argument("--warmup", type=int, default=3, help="число вызовов перед замерами")
+    run_parser.add_argument("--min-time", type=float, default=0.01, help="минимальная длительность замера, с")
+    compare_parser = commands.add_parser("compare", help="сравнить два файла результатов")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="допустимое замедление медианы")
+    commands.add_parser("list", help="список функций для замеров")
+    args = parser.parse_args(argv)
+    match args.command:
+        case "run":
+            results = runner.run(args.kernels, args.implementations, args.repeat, args.warmup, args.min_time,
+                                 progress=print_result)
+            if args.output is not None:
+                compare.save_results(results, args.output)
+            return 0
+        case "compare":
+            rows = compare.compare(compare.load_results(args.base), compare.load_results(args.new), args.threshold)
+            for row in rows:
+                print_row(row)
+            return 1 if compare.has_regressions(rows) else 0
+        case "list":
+            for kernel in kernels.values():
+                print(kernel.name, *kernel.params)
+            return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
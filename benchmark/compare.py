@@ -0,0 +1,66 @@
+import json
+from typing import List, Tuple
+
+from benchmark.runner import SCHEMA_VERSION
+
+# изменения компиляции меньше этой величины считаются шумом
+MIN_COMPILE_DELTA_S = 0.05
+
+
+def load_results(filename: str) -> dict:
+    with open(filename, "r", encoding="utf-8") as infile:
+        results = json.load(infile)
+    if results.get("schema") != SCHEMA_VERSION:
+        raise Exception(f"unsupported results schema {results.get('schema')} in {filename}")
+    return results
+
+
+def save_results(results: dict, filename: str) -> None:
+    with open(filename, "w", encoding="utf-8") as outfile:
+        json.dump(results, outfile, indent=2)
+
+
+def result_key(result: dict) -> Tuple[str, tuple, str]:
+    return result["kernel"], tuple(result["params"]), result["implementation"]
+
+
+def compare(base: dict, new: dict, threshold: float = 0.1) -> List[dict]:
+    # замедление медианы больше чем на threshold считается регрессией, ускорение - улучшением
+    base_results = {result_key(result): result for result in base["results"]}
+    rows = []
+    for result in new["results"]:
+        key = result_key(result)
+        row = {"kernel": key[0], "params": list(key[1]), "implementation": key[2]}
+        old = base_results.get(key)
+        if old is None:
+            rows.append({**row, "status": "new"})
+            continue
+        if "error" in result:
+            rows.append({**row, "status": "ok" if "error" in old else "error", "error": result["error"]})
+            continue
+        if "error" in old:
+            rows.append({**row, "status": "fixed"})
+            continue
+        ratio = result["median_s"] / old["median_s"]
+        status = "ok"
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        compile_delta = result["compile_s"] - old["compile_s"]
+        if compile_delta > MIN_COMPILE_DELTA_S and result["compile_s"] > old["compile_s"] * (1 + threshold):
+            status = "compile regression" if status == "ok" else status
+        rows.append({
+            **row,
+            "status": status,
+            "base_median_s": old["median_s"],
+            "median_s": result["median_s"],
+            "ratio": ratio,
+            "base_compile_s": old["compile_s"],
+            "compile_s": result["compile_s"]
+        })
+    return rows
+
+
+def has_regressions(rows: List[dict]) -> bool:
+    return any(row["status"] in ("regression", "compile regression", "error") for row in rows)
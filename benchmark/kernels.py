@@ -0,0 +1,91 @@
+import array
+
+from benchmark.registry import kernel
+
+# Функции для замеров записаны на подмножестве Python, которое поддерживает @jit,
+# и выполняются без изменений всеми сравниваемыми реализациями
+
+
+@kernel(params=[(2, 2)])
+def sum(x: int, y: int) -> int:
+    res: int = x + y
+    return res
+
+
+@kernel(params=[(10,), (100,), (250,)])
+def exp(x: float) -> float:
+    res: float = 0
+    threshold: float = 1e-30
+    delta: float = 1
+    elements: int = 0
+    while delta > threshold:
+        elements = elements + 1
+        delta = delta * x / elements
+    while elements >= 0:
+        res += delta
+        delta = delta * elements / x
+        elements -= 1
+    return res
+
+
+@kernel(params=[(10,)])
+def hash(x: int) -> int:
+    n: int = 0
+    while n < 1000:
+        x = ((x >> 16) ^ x) * 0x45d9f3b
+        x = ((x >> 16) ^ x) * 0x45d9f3b
+        x = (x >> 16) ^ x
+        n += 1
+    return x
+
+
+@kernel(params=[(20,), (25,)])
+def fib(n: int) -> int:
+    if n < 2:
+        return 1
+    return fib(n - 1) + fib(n - 2)
+
+
+@kernel(params=[(1000,), (3000,)])
+def primes(n: int) -> int:
+    count: int = 0
+    number: int = 2
+    while count < n:
+        i: int = 2
+        is_prime: bool = True
+        while i < number:
+            if number % i == 0:
+                is_prime = False
+                break
+            i += 1
+        if is_prime:
+            count += 1
+        number += 1
+    return number - 1
+
+
+def make_array(size: int) -> array.array:
+    return array.array("d", (i % 17 * 0.25 for i in range(size)))
+
+
+@kernel(params=[(1000,), (100000,)], make_args=lambda size: (make_array(size),))
+def array_sum(xs: list[float]) -> float:
+    res: float = 0
+    for i in range(len(xs)):
+        res += xs[i]
+    return res
+
+
+@kernel(params=[(1000,), (100000,)], make_args=lambda size: (make_array(size), make_array(size)))
+def dot(xs: list[float], ys: list[float]) -> float:
+    res: float = 0
+    for i in range(len(xs)):
+        res += xs[i] * ys[i]
+    return res
+
+
+@kernel(params=[(1000,), (100000,)], make_args=lambda size: (make_array(size), make_array(size), 0.5))
+def axpy(xs: list[float], ys: list[float], a: float) -> int:
+    for i in range(len(xs)):
+        ys[i] = a * xs[i] + ys[i]
+    return len(ys)
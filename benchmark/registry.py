@@ -0,0 +1,27 @@
+from typing import Callable, Dict, List, Optional
+
+
+class Kernel:
+    def __init__(self, name: str, func: Callable, params: List[tuple], make_args: Optional[Callable] = None):
+        self.name = name
+        self.func = func
+        # наборы параметров для перебора
+        self.params = params
+        # построение аргументов по набору параметров, например массивов заданного размера
+        self.make_args = make_args
+
+    def args(self, params: tuple) -> tuple:
+        return self.make_args(*params) if self.make_args is not None else params
+
+
+kernels: Dict[str, Kernel] = {}
+
+
+def kernel(params: List[tuple], name: Optional[str] = None, make_args: Optional[Callable] = None) -> Callable:
+    def register(func: Callable) -> Callable:
+        kernel_name = name or func.__name__
+        if kernel_name in kernels:
+            raise Exception(f"kernel {kernel_name} is already registered")
+        kernels[kernel_name] = Kernel(kernel_name, func, [tuple(elem) for elem in params], make_args)
+        return func
+    return register
@@ -0,0 +1,188 @@
+import datetime
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import benchmark.kernels  # регистрация функций для замеров
+from annotation import jit
+from benchmark.registry import Kernel, kernels
+from code_to_dll import cache, compiler
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# версия формата файла результатов, compare не сравнивает файлы разных версий
+SCHEMA_VERSION = 1
+
+# реализация -> функция, которая по функции Python строит вызываемый объект
+implementations: Dict[str, Callable[[Callable], Callable]] = {
+    "python": lambda func: func,
+    "jit": lambda func: jit(func),
+    "jit_cpython": lambda func: jit(func, backend="cpython"),
+    "numba": lambda func: numba.njit(func)
+}
+
+
+def available_implementations() -> List[str]:
+    return [name for name in implementations if name != "numba" or numba is not None]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def time_calls(func: Callable, args: tuple, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func(*args)
+    return time.perf_counter() - start
+
+
+def measure(func: Callable, args: tuple, repeat: int, warmup: int, min_time: float) -> dict:
+    for _ in range(warmup):
+        func(*args)
+    # число вызовов в одном замере подбирается так, чтобы замер длился не меньше min_time
+    number = 1
+    while (elapsed := time_calls(func, args, number)) < min_time:
+        number = max(number * 2, int(number * min_time / elapsed * 1.2) if elapsed > 0 else number * 10)
+    samples = [time_calls(func, args, number) / number for _ in range(repeat)]
+    return {
+        "median_s": statistics.median(samples),
+        "p95_s": percentile(samples, 0.95),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat
+    }
+
+
+def run_kernel(kernel: Kernel, implementation: str, repeat: int, warmup: int, min_time: float) -> List[dict]:
+    results = []
+    try:
+        start = time.perf_counter()
+        func = implementations[implementation](kernel.func)
+        build_time = time.perf_counter() - start
+    except Exception as error:
+        return [error_result(kernel, params, implementation, error) for params in kernel.params]
+    for params in kernel.params:
+        args = kernel.args(params)
+        try:
+            # время компиляции: построение функции и первый вызов за вычетом времени обычного вызова,
+            # так учитываются и реализации, которые компилируют функцию при первом вызове
+            start = time.perf_counter()
+            value = func(*args)
+            first_call = time.perf_counter() - start
+            stats = measure(func, args, repeat, warmup, min_time)
+        except Exception as error:
+            results.append(error_result(kernel, params, implementation, error))
+            continue
+        compile_time = max(0.0, first_call - stats["median_s"]) + build_time
+        build_time = 0.0
+        results.append({
+            "kernel": kernel.name,
+            "params": list(params),
+            "implementation": implementation,
+            "compile_s": compile_time,
+            **stats,
+            "result": value if isinstance(value, float) or isinstance(value, int) and abs(value) < 2 ** 63 else None
+        })
+    return results
+
+
+def error_result(kernel: Kernel, params: tuple, implementation: str, error: Exception) -> dict:
+    return {
+        "kernel": kernel.name,
+        "params": list(params),
+        "implementation": implementation,
+        "error": f"{type(error).__name__}: {error}"
+    }
+
+
+def compiler_version() -> Optional[str]:
+    try:
+        output = subprocess.run([compiler.compiler_command(), "--version"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.splitlines()[0]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def cpu_model() -> str:
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as infile:
+            for line in infile:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    return platform.processor()
+
+
+def machine_metadata() -> dict:
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "python_implementation": platform.python_implementation(),
+        "python_version": platform.python_version(),
+        "compiler": compiler_version(),
+        "compiler_flags": compiler.compiler_flags(),
+        "numba": numba.__version__ if numba is not None else None,
+        "numpy": numpy.__version__ if numpy is not None else None,
+        "commit": git_commit()
+    }
+
+
+def run(kernel_names: Optional[Iterable[str]] = None, implementation_names: Optional[Iterable[str]] = None,
+        repeat: int = 15, warmup: int = 3, min_time: float = 0.01,
+        progress: Optional[Callable[[dict], None]] = None) -> dict:
+    kernel_names = list(kernel_names or kernels)
+    implementation_names = list(implementation_names or available_implementations())
+    for name in kernel_names:
+        if name not in kernels:
+            raise Exception(f"unknown kernel {name}")
+    for name in implementation_names:
+        if name not in implementations:
+            raise Exception(f"unknown implementation {name}")
+    results = []
+    # библиотеки собираются в пустом временном кэше, чтобы время компиляции не зависело от прошлых запусков
+    cache_dir, cache.CACHE_DIR = cache.CACHE_DIR, tempfile.mkdtemp(prefix="metastruct-benchmark-")
+    try:
+        for kernel_name in kernel_names:
+            for implementation in implementation_names:
+                for result in run_kernel(kernels[kernel_name], implementation, repeat, warmup, min_time):
+                    results.append(result)
+                    if progress is not None:
+                        progress(result)
+    finally:
+        shutil.rmtree(cache.CACHE_DIR, ignore_errors=True)
+        cache.CACHE_DIR = cache_dir
+    return {
+        "schema": SCHEMA_VERSION,
+        "machine": machine_metadata(),
+        "settings": {"repeat": repeat, "warmup": warmup, "min_time_s": min_time},
+        "results": results
+    }
@@ -0,0 +1,271 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from code_to_dll import timing
+from tree_to_code.dump_visitor import BACKEND_VERSION, ctype_convert
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# каталог кэша задаётся переменной окружения, иначе используется каталог кэша пользователя;
+# CACHE_DIR переопределяет его внутри процесса
+CACHE_DIR_ENV = "METASTRUCT_CACHE_DIR"
+CACHE_DIR: Optional[str] = None
+# предельный размер кэша, например "512M"; 0 отключает ограничение
+MAX_SIZE_ENV = "METASTRUCT_CACHE_MAX_SIZE"
+DEFAULT_MAX_SIZE = "1G"
+
+# все файлы записи кэша начинаются с `<имя>-<16 символов ключа>`: .cpp, .dll, .json, .o, каталог .profile
+entry_pattern = re.compile(r"^(.+-[0-9a-f]{16})(\..*)?$")
+size_units = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def cache_dir() -> str:
+    if CACHE_DIR:
+        return CACHE_DIR
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "metastruct")
+
+
+def parse_size(size: str) -> int:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", size.upper())
+    if match is None:
+        raise Exception(f"unsupported cache size {size}")
+    return int(float(match.group(1)) * size_units[match.group(2)])
+
+
+def max_size() -> int:
+    return parse_size(os.environ.get(MAX_SIZE_ENV) or DEFAULT_MAX_SIZE)
+
+
+def cache_key(text: str, compiler_id: str, flags: List[str]) -> str:
+    digest = hashlib.sha256()
+    for part in (BACKEND_VERSION, compiler_id, " ".join(flags), text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def entry_paths(name: str, key: str) -> Tuple[str, str, str]:
+    directory = cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{name}-{key[:16]}")
+    return base + ".cpp", base + ".dll", base + ".json"
+
+
+def is_complete(dll_filename: str, meta_filename: str) -> bool:
+    # файл сигнатур публикуется последним, поэтому при его наличии библиотека уже записана полностью
+    return os.path.exists(meta_filename) and os.path.exists(dll_filename)
+
+
+def temp_path(filename: str) -> str:
+    # временное имя уникально для процесса и потока; расширение сохраняется для компилятора
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{os.getpid()}-{threading.get_ident()}.tmp{ext}"
+
+
+def write_atomic(filename: str, text: str) -> None:
+    temp_filename = temp_path(filename)
+    with open(temp_filename, "w", encoding="utf-8") as outfile:
+        outfile.write(text)
+    os.replace(temp_filename, filename)
+
+
+# блокировки записей внутри процесса: файловые блокировки не всегда разделяют потоки одного процесса
+thread_locks: Dict[str, threading.Lock] = {}
+thread_locks_guard = threading.Lock()
+
+
+def lock_path(base: str) -> str:
+    directory = os.path.join(os.path.dirname(base), "locks")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, os.path.basename(base) + ".lock")
+
+
+@contextlib.contextmanager
+def file_lock(filename: str) -> Iterator[None]:
+    with open(filename, "a+b") as lock_file:
+        fd = lock_file.fileno()
+        with timing.phase("lock_wait"):
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                # LK_LOCK ждёт около 10 секунд и бросает исключение, поэтому попытки повторяются
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def entry_lock(dll_filename: str) -> Iterator[None]:
+    # запись собирает один поток одного процесса, остальные ждут и загружают готовую библиотеку
+    base = os.path.splitext(dll_filename)[0]
+    with thread_locks_guard:
+        thread_lock = thread_locks.setdefault(base, threading.Lock())
+    with timing.phase("lock_wait"):
+        thread_lock.acquire()
+    try:
+        with file_lock(lock_path(base)):
+            yield
+    finally:
+        thread_lock.release()
+
+
+def touch(meta_filename: str) -> None:
+    # время изменения файла сигнатур - время последней загрузки записи, по нему вытесняются старые записи
+    try:
+        os.utime(meta_filename)
+    except OSError:
+        pass
+
+
+def path_size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(path_size(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def entries(directory: Optional[str] = None) -> Dict[str, dict]:
+    directory = directory or cache_dir()
+    res = {}
+    if not os.path.isdir(directory):
+        return res
+    for filename in os.listdir(directory):
+        match = entry_pattern.match(filename)
+        if match is None:
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            size, modified = path_size(path), os.path.getmtime(path)
+        except OSError:
+            continue
+        entry = res.setdefault(match.group(1), {
+            "paths": [],
+            "bytes": 0,
+            "last_used": 0.0,
+            "lock": os.path.join(directory, "locks", match.group(1) + ".lock")
+        })
+        entry["paths"].append(path)
+        entry["bytes"] += size
+        # файл сигнатур обновляется при каждой загрузке и всегда самый новый в записи
+        entry["last_used"] = max(entry["last_used"], modified)
+    return res
+
+
+def remove_entry(entry: dict) -> bool:
+    removed = True
+    for path in entry["paths"] + [entry["lock"]] * os.path.exists(entry["lock"]):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            # на Windows загруженную библиотеку удалить нельзя, запись удалится при следующей очистке
+            removed = False
+    return removed
+
+
+def prune(limit: Optional[int] = None, directory: Optional[str] = None,
+          keep: Optional[str] = None) -> Tuple[int, int]:
+    # записи удаляются, начиная с давно не загружавшихся, пока общий размер больше предела;
+    # запись keep (только что собранная библиотека) не удаляется
+    limit = max_size() if limit is None else limit
+    if limit <= 0:
+        return 0, 0
+    cached = sorted(entries(directory).items(), key=lambda item: item[1]["last_used"])
+    total = sum(entry["bytes"] for _, entry in cached)
+    removed_entries, removed_bytes = 0, 0
+    for base, entry in cached:
+        if total <= limit:
+            break
+        if base != keep and remove_entry(entry):
+            total -= entry["bytes"]
+            removed_entries += 1
+            removed_bytes += entry["bytes"]
+    return removed_entries, removed_bytes
+
+
+def clear(directory: Optional[str] = None) -> Tuple[int, int]:
+    # удаляются только файлы записей кэша, остальные файлы каталога не трогаются
+    removed_entries, removed_bytes = 0, 0
+    for entry in entries(directory).values():
+        if remove_entry(entry):
+            removed_entries += 1
+            removed_bytes += entry["bytes"]
+    return removed_entries, removed_bytes
+
+
+def stats(directory: Optional[str] = None) -> dict:
+    cached = entries(directory)
+    last_used = [entry["last_used"] for entry in cached.values()]
+    return {
+        "directory": directory or cache_dir(),
+        "entries": len(cached),
+        "bytes": sum(entry["bytes"] for entry in cached.values()),
+        "max_bytes": max_size(),
+        "oldest": min(last_used, default=None),
+        "newest": max(last_used, default=None)
+    }
+
+
+def source_key(text: str, flags: List[str]) -> str:
+    # ключ без версии компилятора: по нему находятся заранее собранные библиотеки там, где компилятора нет
+    return cache_key(text, "", flags)
+
+
+def dump_signatures(signatures: dict) -> dict:
+    return {
+        name: {
+            "argtypes": signature["cpp_argtypes"],
+            "restype": signature["cpp_restype"],
+            "written": signature["written"]
+        } for name, signature in signatures.items()
+    }
+
+
+def parse_signatures(meta: dict) -> dict:
+    return {
+        name: {
+            "argtypes": list(map(ctype_convert, signature["argtypes"], signature["written"])),
+            "restype": ctype_convert(signature["restype"]),
+            "cpp_argtypes": signature["argtypes"],
+            "cpp_restype": signature["restype"],
+            "written": signature["written"]
+        } for name, signature in meta.items()
+    }
+
+
+def store_signatures(meta_filename: str, signatures: dict) -> None:
+    write_atomic(meta_filename, json.dumps(dump_signatures(signatures), indent=4))
+
+
+def load_signatures(meta_filename: str) -> dict:
+    with open(meta_filename, "r", encoding="utf-8") as infile:
+        return parse_signatures(json.load(infile))
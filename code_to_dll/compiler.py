@@ -0,0 +1,98 @@
+import functools
+import os
+import shlex
+import shutil
+import subprocess
+from typing import List, Optional
+
+from code_to_dll import timing
+
+DEFAULT_COMPILER = "g++"
+# компиляторы для быстрой первой сборки в порядке предпочтения; tcc не подходит, генерируется код на C++
+FAST_COMPILERS = ("clang++", "g++")
+
+
+def env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+# параметры компиляции по умолчанию для всего процесса, задаются переменными окружения или set_default_options
+default_options = {
+    "opt_level": os.environ.get("METASTRUCT_OPT_LEVEL", "2"),
+    "native_arch": env_flag("METASTRUCT_NATIVE_ARCH"),
+    "fast_math": env_flag("METASTRUCT_FAST_MATH"),
+    "lto": env_flag("METASTRUCT_LTO"),
+    "extra_flags": shlex.split(os.environ.get("METASTRUCT_EXTRA_FLAGS", "")),
+    "compiler_name": os.environ.get("METASTRUCT_COMPILER", DEFAULT_COMPILER),
+    # первая сборка для @jit(fast_start=True), по умолчанию первый найденный компилятор из FAST_COMPILERS
+    "fast_compiler_name": os.environ.get("METASTRUCT_FAST_COMPILER"),
+    "fast_opt_level": os.environ.get("METASTRUCT_FAST_OPT_LEVEL", "0")
+}
+
+
+def set_default_options(**options) -> None:
+    for option in options:
+        if option not in default_options:
+            raise Exception(f"unknown compiler option {option}")
+    default_options.update(options)
+
+
+def compiler_flags(opt_level: Optional[int | str] = None, native_arch: Optional[bool] = None,
+                   fast_math: Optional[bool] = None, lto: Optional[bool] = None,
+                   extra_flags: Optional[List[str]] = None) -> List[str]:
+    options = dict(default_options)
+    for option, value in (("opt_level", opt_level), ("native_arch", native_arch), ("fast_math", fast_math),
+                          ("lto", lto), ("extra_flags", extra_flags)):
+        if value is not None:
+            options[option] = value
+    flags = [f"-O{options['opt_level']}"]
+    if options["native_arch"]:
+        flags.append("-march=native")
+    if options["fast_math"]:
+        flags.append("-ffast-math")
+    if options["lto"]:
+        flags.append("-flto")
+    return flags + list(options["extra_flags"])
+
+
+def compiler_command(compiler_name: Optional[str] = None) -> str:
+    return compiler_name or default_options["compiler_name"]
+
+
+def fast_compiler() -> str:
+    if default_options["fast_compiler_name"]:
+        return default_options["fast_compiler_name"]
+    for compiler_name in FAST_COMPILERS:
+        if shutil.which(compiler_name) is not None:
+            return compiler_name
+    return compiler_command()
+
+
+def fast_tier_options(**options) -> dict:
+    # быстрая сборка без оптимизаций и LTO; остальные параметры совпадают с полной сборкой
+    return {
+        **options,
+        "compiler_name": fast_compiler(),
+        "opt_level": default_options["fast_opt_level"],
+        "lto": False
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_identity(compiler: str = DEFAULT_COMPILER) -> str:
+    # версия компилятора определяется по самому бинарнику, без запуска `g++ --version`
+    path = shutil.which(compiler)
+    if path is None:
+        raise Exception(f"compiler {compiler} not found")
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_library(text: str, dll_filename: str, flags: List[str], compiler_name: str = DEFAULT_COMPILER,
+                  include: Optional[str] = None) -> None:
+    # компиляция и сборка библиотеки одним вызовом компилятора, исходный код передаётся через stdin
+    include_flags = [] if include is None else ["-include", include]
+    with timing.phase("compile"):
+        subprocess.run([compiler_name, *flags, "-fPIC", "-shared", *include_flags, "-x", "c++", "-", "-o", dll_filename],
+                       input=text, text=True, check=True)
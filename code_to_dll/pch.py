@@ -0,0 +1,51 @@
+import os
+import subprocess
+from typing import List, Optional, Tuple
+
+from code_to_dll import cache, compiler, timing
+
+# начальные директивы препроцессора генерируемого кода (Python.h, <chrono>) компилируются один раз в предкомпилированный
+# заголовок; заголовок хранится в кэше как обычная запись и вытесняется вместе с библиотеками
+PCH_ENV = "METASTRUCT_PCH"
+
+
+def enabled() -> bool:
+    return os.environ.get(PCH_ENV, "1").lower() not in ("0", "false", "no", "off")
+
+
+def split_header(text: str) -> Tuple[str, str]:
+    lines = text.splitlines(keepends=True)
+    count = 0
+    while count < len(lines) and (lines[count].startswith("#") or not lines[count].strip()):
+        count += 1
+    return "".join(lines[:count]), "".join(lines[count:])
+
+
+def precompiled_header(header: str, flags: List[str], compiler_name: str) -> Optional[str]:
+    # заголовок собирается с теми же флагами, что и библиотека, иначе компилятор его не примет
+    key = cache.cache_key(header, compiler.compiler_identity(compiler_name), flags)
+    header_filename = os.path.join(cache.cache_dir(), f"prelude-{key[:16]}.hpp")
+    pch_filename = header_filename + ".gch"
+    if not cache.is_complete(header_filename, pch_filename):
+        with cache.entry_lock(header_filename):
+            if not cache.is_complete(header_filename, pch_filename):
+                cache.write_atomic(header_filename, header)
+                temp_filename = cache.temp_path(pch_filename)
+                try:
+                    with timing.phase("pch"):
+                        subprocess.run([compiler_name, *flags, "-fPIC", "-x", "c++-header", header_filename,
+                                        "-o", temp_filename], check=True, capture_output=True)
+                except subprocess.CalledProcessError:
+                    # без предкомпилированного заголовка библиотека собирается из полного исходного кода
+                    return None
+                os.replace(temp_filename, pch_filename)
+    cache.touch(header_filename)
+    return header_filename
+
+
+def build_pch_library(text: str, dll_filename: str, flags: List[str],
+                      compiler_name: str = compiler.DEFAULT_COMPILER) -> None:
+    header, body = split_header(text)
+    include = precompiled_header(header, flags, compiler_name) if header.strip() and enabled() else None
+    # если заголовок найден, вместо него компилятор загружает файл .gch из того же каталога
+    compiler.build_library(text if include is None else body, dll_filename, flags, compiler_name, include)
@@ -0,0 +1,65 @@
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from typing import List
+
+from code_to_dll import compiler, timing
+
+# обучающие вызовы выполняются в отдельном процессе: профиль .gcda записывается при его завершении
+TRAINING_SCRIPT = """
+import ctypes
+import json
+import sys
+
+ctypes_by_name = {"int": ctypes.c_int, "double": ctypes.c_double, "bool": ctypes.c_bool}
+dll_filename, name, signature = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+func = ctypes.CDLL(dll_filename)[name]
+func.argtypes = [ctypes_by_name[arg_type] for arg_type in signature["argtypes"]]
+func.restype = ctypes_by_name[signature["restype"]]
+for args in json.load(sys.stdin):
+    func(*args)
+"""
+
+
+def samples_digest(samples: List[tuple]) -> str:
+    return hashlib.sha256(json.dumps([list(args) for args in samples]).encode("utf-8")).hexdigest()
+
+
+def train_library(dll_filename: str, name: str, signature: dict, samples: List[tuple]) -> None:
+    for arg_type in signature["cpp_argtypes"]:
+        if arg_type.startswith("Buffer<"):
+            raise Exception("profile-guided optimisation supports only scalar arguments")
+    meta = json.dumps({"argtypes": signature["cpp_argtypes"], "restype": signature["cpp_restype"]})
+    subprocess.run(
+        [sys.executable, "-c", TRAINING_SCRIPT, dll_filename, name, meta],
+        input=json.dumps([list(args) for args in samples]), text=True, check=True
+    )
+
+
+def build_pgo_library(cpp_filename: str, dll_filename: str, flags: List[str], name: str, signature: dict,
+                      samples: List[tuple], compiler_name: str = compiler.DEFAULT_COMPILER) -> None:
+    # имя объектного файла одинаково для обеих сборок, по нему gcc находит файл профиля
+    base = os.path.splitext(dll_filename)[0]
+    profile_dir = os.path.abspath(base + ".profile")
+    o_filename = base + ".o"
+    if not glob.glob(os.path.join(profile_dir, "*.gcda")):
+        generate_flags = flags + [f"-fprofile-generate={profile_dir}", "-fprofile-update=atomic"]
+        instrumented_filename = base + ".instrumented.dll"
+        with timing.phase("compile"):
+            subprocess.run([compiler_name, *generate_flags, "-fPIC", "-c", cpp_filename, "-o", o_filename],
+                           check=True)
+        with timing.phase("link_library"):
+            subprocess.run([compiler_name, *generate_flags, "-shared", o_filename, "-o", instrumented_filename],
+                           check=True)
+        with timing.phase("train"):
+            train_library(instrumented_filename, name, signature, samples)
+        os.remove(instrumented_filename)
+    use_flags = flags + [f"-fprofile-use={profile_dir}", "-fprofile-correction", "-Wno-missing-profile"]
+    with timing.phase("compile"):
+        subprocess.run([compiler_name, *use_flags, "-fPIC", "-c", cpp_filename, "-o", o_filename], check=True)
+    with timing.phase("link_library"):
+        subprocess.run([compiler_name, *use_flags, "-shared", o_filename, "-o", dll_filename], check=True)
+    os.remove(o_filename)
@@ -0,0 +1,99 @@
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Iterator, List, Optional
+
+# файл, в который дописывается по одной строке JSON на каждую компиляцию
+LOG_ENV = "METASTRUCT_COMPILE_LOG"
+
+log_lock = threading.Lock()
+# компиляции, которые выполняются в текущем потоке, вложенные компиляции идут на вершине стека
+local = threading.local()
+
+
+class CompileStats:
+    def __init__(self, name: str, backend: str = "ctypes", tier: Optional[str] = None):
+        self.name = name
+        self.backend = backend
+        # уровень сборки @jit(fast_start=True): fast или optimised
+        self.tier = tier
+        self.timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        # этап -> время в секундах: source, parse, passes, link, codegen, cache_lookup, lock_wait,
+        # pch, compile, link_library (только PGO), train, load
+        self.phases = {}
+        self.total = 0.0
+        self.cache_hit: Optional[bool] = None
+        self.source_bytes: Optional[int] = None
+        self.library_bytes: Optional[int] = None
+        self.library: Optional[str] = None
+        self.compiler: Optional[str] = None
+        self.flags: List[str] = []
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "backend": self.backend,
+            "tier": self.tier,
+            "timestamp": self.timestamp,
+            "total_s": self.total,
+            "phases_s": dict(self.phases),
+            "cache_hit": self.cache_hit,
+            "source_bytes": self.source_bytes,
+            "library_bytes": self.library_bytes,
+            "library": self.library,
+            "compiler": self.compiler,
+            "flags": self.flags
+        }
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{phase}={seconds * 1e3:.1f}ms" for phase, seconds in self.phases.items())
+        name = self.name if self.tier is None else f"{self.name}, tier={self.tier}"
+        return f"CompileStats({name}, total={self.total * 1e3:.1f}ms, cache_hit={self.cache_hit}, {phases})"
+
+
+def stack() -> List[CompileStats]:
+    if not hasattr(local, "stack"):
+        local.stack = []
+    return local.stack
+
+
+def current() -> Optional[CompileStats]:
+    records = stack()
+    return records[-1] if records else None
+
+
+@contextlib.contextmanager
+def recording(name: str, backend: str = "ctypes", tier: Optional[str] = None) -> Iterator[CompileStats]:
+    stats = CompileStats(name, backend, tier)
+    stack().append(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.total = time.perf_counter() - start
+        stack().pop()
+    write_log(stats)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    stats = current()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.phases[name] = stats.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def write_log(stats: CompileStats) -> None:
+    filename = os.environ.get(LOG_ENV)
+    if not filename:
+        return
+    line = json.dumps(stats.as_dict())
+    with log_lock:
+        with open(filename, "a", encoding="utf-8") as outfile:
+            outfile.write(line + "\n")
@@ -0,0 +1,116 @@
+import argparse
+import datetime
+import importlib
+import os
+import pkgutil
+import sys
+import traceback
+from typing import List, Set, Tuple
+
+import annotation
+from code_to_dll import cache
+from metastruct import aot
+from tree_to_tree import linking
+
+
+def import_modules(names: List[str]) -> Set[str]:
+    # модули импортируются целиком: функции с @jit компилируются при импорте, пакеты обходятся рекурсивно
+    imported = set()
+    for name in names:
+        module = importlib.import_module(name)
+        imported.add(module.__name__)
+        if hasattr(module, "__path__"):
+            for info in pkgutil.walk_packages(module.__path__, module.__name__ + "."):
+                imported.add(importlib.import_module(info.name).__name__)
+    return imported
+
+
+def compile_deferred(modules: Set[str]) -> Tuple[List[str], List[str]]:
+    # функции с отложенной, фоновой и многоуровневой компиляцией собираются сразу
+    compiled, skipped = {}, {}
+    for jit_object, func, _ in list(linking.registry.values()):
+        if func.__module__ not in modules:
+            continue
+        name = f"{func.__module__}.{func.__qualname__}"
+        if isinstance(jit_object, annotation.BackgroundJit):
+            jit_object.wait_compiled()
+        elif isinstance(jit_object, annotation.LazyJit):
+            jit_object.compile()
+        elif isinstance(jit_object, annotation.SpecializingJit) and not jit_object.variants:
+            # варианты собираются по типам аргументов, без `signatures` собирать нечего
+            skipped[name] = f"{name}: specialize=True without signatures, variants are compiled at run time"
+            continue
+        elif isinstance(jit_object, annotation.Vectorize) and not jit_object.loops:
+            skipped[name] = f"{name}: vectorize loops are compiled per dtype at run time"
+            continue
+        # jit_module регистрирует и ленивую обёртку, и собранную функцию
+        compiled[name] = None
+    return list(compiled), [reason for name, reason in skipped.items() if name not in compiled]
+
+
+def build(args: argparse.Namespace) -> int:
+    sys.path.insert(0, os.getcwd())
+    aot.start_build(args.output)
+    try:
+        modules = import_modules(args.modules)
+        compiled, skipped = compile_deferred(modules)
+        annotation.wait_compiled()
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        filename = aot.finish_build()
+    for name in sorted(compiled):
+        print(name)
+    for reason in skipped + aot.build_skipped:
+        print(f"warning: not in manifest: {reason}", file=sys.stderr)
+    print(f"manifest: {filename}")
+    return 0
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024 or unit == "G":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def cache_command(args: argparse.Namespace) -> int:
+    match args.action:
+        case "stats":
+            info = cache.stats()
+            print(f"directory: {info['directory']}")
+            print(f"entries: {info['entries']}")
+            print(f"size: {format_size(info['bytes'])} of {format_size(info['max_bytes'])}")
+            if info["oldest"] is not None:
+                print(f"last used: {datetime.datetime.fromtimestamp(info['oldest']):%Y-%m-%d %H:%M} .. "
+                      f"{datetime.datetime.fromtimestamp(info['newest']):%Y-%m-%d %H:%M}")
+        case "prune":
+            limit = cache.parse_size(args.max_size) if args.max_size is not None else None
+            removed, size = cache.prune(limit)
+            print(f"removed {removed} entries, {format_size(size)}")
+        case "clear":
+            removed, size = cache.clear()
+            print(f"removed {removed} entries, {format_size(size)}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m metastruct")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="заранее собрать функции с @jit из модулей и пакетов")
+    build_parser.add_argument("modules", nargs="+", help="имена модулей или пакетов для импорта")
+    build_parser.add_argument("-o", "--output", default="metastruct_build", help="каталог для библиотек и манифеста")
+    cache_parser = commands.add_parser("cache", help="кэш скомпилированных библиотек")
+    cache_parser.add_argument("action", choices=["stats", "prune", "clear"])
+    cache_parser.add_argument("--max-size", help="предельный размер для prune, например 512M")
+    args = parser.parse_args(argv)
+    match args.command:
+        case "build":
+            return build(args)
+        case "cache":
+            return cache_command(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import sys
+import sysconfig
+import threading
+from typing import List, Optional, Tuple
+
+from code_to_dll import cache
+from tree_to_code.dump_visitor import BACKEND_VERSION
+
+# путь к манифесту заранее собранных библиотек, которые загружаются вместо компиляции
+MANIFEST_ENV = "METASTRUCT_MANIFEST"
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+manifest_lock = threading.Lock()
+# загруженный манифест: (каталог, содержимое); None - манифест ещё не читался
+loaded_manifest: Optional[Tuple[str, dict]] = None
+# каталог, в который собираются библиотеки командой `python -m metastruct build`
+build_dir: Optional[str] = None
+build_manifest: Optional[dict] = None
+# библиотеки, не попавшие в манифест сборки, с причиной
+build_skipped: List[str] = []
+
+
+def target() -> dict:
+    # библиотеки подходят только для той же платформы, версии Python и генератора кода
+    return {
+        "backend_version": BACKEND_VERSION,
+        "platform": sysconfig.get_platform(),
+        "python": sys.implementation.cache_tag
+    }
+
+
+def use_manifest(filename: Optional[str]) -> None:
+    global loaded_manifest
+    with manifest_lock:
+        loaded_manifest = read_manifest(filename) if filename else (None, {})
+
+
+def read_manifest(filename: str) -> Tuple[Optional[str], dict]:
+    if os.path.isdir(filename):
+        filename = os.path.join(filename, MANIFEST_FILENAME)
+    if not os.path.exists(filename):
+        return None, {}
+    with open(filename, "r", encoding="utf-8") as infile:
+        manifest = json.load(infile)
+    # манифест другой версии или платформы не используется, функции компилируются заново
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("target") != target():
+        return None, {}
+    return os.path.dirname(os.path.abspath(filename)), manifest
+
+
+def lookup(key: str) -> Optional[Tuple[str, dict]]:
+    global loaded_manifest
+    if build_dir is not None:
+        return None
+    with manifest_lock:
+        if loaded_manifest is None:
+            filename = os.environ.get(MANIFEST_ENV)
+            loaded_manifest = read_manifest(filename) if filename else (None, {})
+        directory, manifest = loaded_manifest
+    entry = manifest.get("kernels", {}).get(key)
+    if entry is None:
+        return None
+    dll_filename = os.path.join(directory, entry["library"])
+    if not os.path.exists(dll_filename):
+        return None
+    return dll_filename, cache.parse_signatures(entry["signatures"])
+
+
+def start_build(directory: str) -> None:
+    global build_dir, build_manifest
+    os.makedirs(directory, exist_ok=True)
+    build_dir = directory
+    build_manifest = {"version": MANIFEST_VERSION, "target": target(), "kernels": {}}
+    build_skipped.clear()
+
+
+def record(key: str, name: str, dll_filename: str, signatures: dict, flags: List[str]) -> None:
+    if build_dir is None:
+        return
+    if "-march=native" in flags:
+        # набор инструкций зависит от процессора сборки, а в target() он не входит
+        with manifest_lock:
+            build_skipped.append(f"{name}: built with -march=native, not portable to other CPUs")
+        return
+    library = f"{name}-{key[:16]}{os.path.splitext(dll_filename)[1]}"
+    shutil.copyfile(dll_filename, os.path.join(build_dir, library))
+    with manifest_lock:
+        build_manifest["kernels"][key] = {
+            "name": name,
+            "library": library,
+            "signatures": cache.dump_signatures(signatures)
+        }
+
+
+def finish_build() -> str:
+    global build_dir, build_manifest
+    filename = os.path.join(build_dir, MANIFEST_FILENAME)
+    with open(filename, "w", encoding="utf-8") as outfile:
+        json.dump(build_manifest, outfile, indent=2)
+    build_dir, build_manifest = None, None
+    return filename
@@ -0,0 +1,54 @@
+import ctypes
+import threading
+from typing import Dict, List, Optional
+
+from code_to_dll.compiler import env_flag
+
+# переменная окружения включает профилирование для всех функций процесса
+PROFILE_ENV = "METASTRUCT_PROFILE"
+
+
+class Counter(ctypes.Structure):
+    # совпадает со структурой ProfileCounter в сгенерированном коде
+    _fields_ = [
+        ("calls", ctypes.c_ulonglong),
+        ("nanoseconds", ctypes.c_ulonglong)
+    ]
+
+
+# имя функции -> счётчики во всех загруженных библиотеках, например в разных специализациях
+counters: Dict[str, List[Counter]] = {}
+counters_lock = threading.Lock()
+
+
+def enabled(profile: Optional[bool] = None) -> bool:
+    return env_flag(PROFILE_ENV) if profile is None else profile
+
+
+def attach(library: ctypes.CDLL, signatures: dict) -> None:
+    with counters_lock:
+        for name in signatures:
+            counter = Counter.in_dll(library, f"{name}__profile")
+            # библиотека из кэша, загруженная повторно, отображается на те же адреса
+            known = counters.setdefault(name, [])
+            if all(ctypes.addressof(elem) != ctypes.addressof(counter) for elem in known):
+                known.append(counter)
+
+
+def snapshot() -> Dict[str, dict]:
+    # счётчики читаются напрямую из памяти библиотек, функции при этом не вызываются
+    res = {}
+    with counters_lock:
+        for name, known in counters.items():
+            calls = sum(counter.calls for counter in known)
+            total = sum(counter.nanoseconds for counter in known) / 1e9
+            res[name] = {"calls": calls, "total_s": total, "mean_s": total / calls if calls else 0.0}
+    return dict(sorted(res.items(), key=lambda item: item[1]["total_s"], reverse=True))
+
+
+def reset() -> None:
+    with counters_lock:
+        for known in counters.values():
+            for counter in known:
+                counter.calls = 0
+                counter.nanoseconds = 0
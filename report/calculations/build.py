@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sysconfig
+import tempfile
+from json import dumps
+from time import perf_counter
+
+from annotation import parse_function
+import benchmark.kernels  # регистрация функций для замеров
+from benchmark.registry import kernels
+from code_to_dll import cache, compiler, pch
+from tree_to_code import dump_extension
+from tree_to_code.dump_visitor import dump_cpp
+
+# Время сборки библиотеки для функций из набора замеров: прежняя сборка через файлы (.cpp, g++ -c, g++ -shared)
+# и сборка одним вызовом компилятора через stdin; для модулей расширения - с предкомпилированным Python.h и без него
+
+REPEAT = 3
+
+
+def build_with_files(text: str, dll_filename: str, flags: list) -> None:
+    base = os.path.splitext(dll_filename)[0]
+    with open(base + ".cpp", "w", encoding="utf-8") as outfile:
+        outfile.write(text)
+    subprocess.run([compiler.DEFAULT_COMPILER, *flags, "-fPIC", "-c", base + ".cpp", "-o", base + ".o"], check=True)
+    subprocess.run([compiler.DEFAULT_COMPILER, *flags, "-shared", base + ".o", "-o", dll_filename], check=True)
+    os.remove(base + ".o")
+
+
+def best_time(build, text: str, dll_filename: str, flags: list) -> float:
+    times = []
+    for _ in range(REPEAT):
+        start = perf_counter()
+        build(text, dll_filename, flags)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+directory = tempfile.mkdtemp()
+cache.CACHE_DIR = directory
+dll_filename = os.path.join(directory, "kernel.dll")
+flags = compiler.compiler_flags()
+extension_flags = flags + ["-I", sysconfig.get_paths()["include"]]
+results = {}
+for name, kernel in kernels.items():
+    text, signatures = dump_cpp(parse_function(kernel.func))
+    extension_text = dump_extension.dump_extension(f"_kernel_{name}", text, signatures)
+    os.environ[pch.PCH_ENV] = "0"
+    res = {
+        "files_ms": best_time(build_with_files, text, dll_filename, flags) * 1e3,
+        "stdin_ms": best_time(pch.build_pch_library, text, dll_filename, flags) * 1e3,
+        "extension_files_ms": best_time(build_with_files, extension_text, dll_filename, extension_flags) * 1e3
+    }
+    os.environ[pch.PCH_ENV] = "1"
+    # заголовок собирается один раз на весь процесс, в замер не входит
+    pch.build_pch_library(extension_text, dll_filename, extension_flags)
+    res["extension_pch_ms"] = best_time(pch.build_pch_library, extension_text, dll_filename, extension_flags) * 1e3
+    results[name] = res
+    print(f"{name:<12} files {res['files_ms']:.1f} ms\tstdin {res['stdin_ms']:.1f} ms\t"
+          f"extension files {res['extension_files_ms']:.1f} ms\textension stdin+pch {res['extension_pch_ms']:.1f} ms")
+
+print(dumps(results, indent=2))
@@ -0,0 +1,40 @@
+from annotation import jit
+from timeit import repeat
+from json import dumps
+
+# Накладные расходы на один вызов: ctypes против модуля расширения CPython (METH_FASTCALL)
+
+results = {}
+number = 1000000
+
+
+def py_sum(x: int, y: int) -> int:
+    res: int = x + y
+    return res
+
+
+def py_hash(x: int) -> int:
+    x = ((x >> 16) ^ x) * 0x45d9f3b
+    x = ((x >> 16) ^ x) * 0x45d9f3b
+    x = (x >> 16) ^ x
+    return x
+
+
+def py_mul(x: float, y: float) -> float:
+    return x * y
+
+
+for func, args in ((py_sum, (2, 2)), (py_hash, (42,)), (py_mul, (1.5, 2.5))):
+    variants = {
+        "pure python": func,
+        "ctypes": jit(func),
+        "cpython": jit(func, backend="cpython")
+    }
+    times = {}
+    for variant, variant_func in variants.items():
+        best = min(repeat(lambda: variant_func(*args), repeat=5, number=number))
+        times[variant] = best / number * 1e9
+        print(f"{func.__name__}\t{variant}\t{times[variant]:.1f} ns/call")
+    results[func.__name__] = times
+
+print(dumps(results, indent=2))
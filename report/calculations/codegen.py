@@ -0,0 +1,41 @@
+import ast
+from timeit import repeat
+from json import dumps
+
+from tree_to_code.dump_visitor import dump_cpp
+
+# Время генерации C++ для больших функций: вложенные циклы и ветвления глубиной depth,
+# в каждом блоке statements операторов. Время на один узел не должно расти с глубиной вложенности
+
+
+def generate_source(depth: int, statements: int) -> str:
+    lines = ["def generated(n: int, x: float) -> float:", "    res: float = 0"]
+    for level in range(depth):
+        space = "    " * (level + 1)
+        lines.append(f"{space}i{level}: int = 0")
+        lines.append(f"{space}while i{level} < n:")
+        space += "    "
+        for k in range(statements):
+            lines.append(f"{space}res = res + x * {k} - (i{level} % 7) / 3")
+        lines.append(f"{space}if res > {level}:")
+        lines.append(f"{space}    res -= 1")
+        lines.append(f"{space}elif res < -{level}:")
+        lines.append(f"{space}    res += 1")
+        lines.append(f"{space}else:")
+        lines.append(f"{space}    res *= 0.5")
+        lines.append(f"{space}i{level} += 1")
+    lines.append("    return res")
+    return "\n".join(lines) + "\n"
+
+
+results = {}
+for depth in (1, 10, 40, 80):
+    for statements in (10, 100):
+        tree = ast.parse(generate_source(depth, statements))
+        nodes = sum(1 for _ in ast.walk(tree))
+        best = min(repeat(lambda: dump_cpp(tree), repeat=5, number=3)) / 3
+        results[f"{depth}x{statements}"] = {"nodes": nodes, "ms": best * 1e3, "ns/node": best / nodes * 1e9}
+        print(f"depth {depth}\tstatements {statements}\tnodes {nodes}\t{best * 1e3:.2f} ms\t"
+              f"{best / nodes * 1e9:.0f} ns/node")
+
+print(dumps(results, indent=2))
@@ -0,0 +1,102 @@
+import array
+
+import numpy
+
+from annotation import jit
+
+# Аргументы-буферы: формат элементов проверяется, объекты с протоколом буфера передаются без копирования,
+# а копии (списки и буферы только для чтения) отклоняются, если функция в них пишет
+
+
+def total(xs: list[int]) -> int:
+    res: int = 0
+    for i in range(len(xs)):
+        res += xs[i]
+    return res
+
+
+def ends(xs: list[float]) -> float:
+    return xs[-1] * 10 + xs[-len(xs)]
+
+
+def scale(xs: list[float], k: float) -> int:
+    for i in range(len(xs)):
+        xs[i] *= k
+    return len(xs)
+
+
+def fill_bytes(data: memoryview, value: int) -> int:
+    for i in range(len(data)):
+        data[i] = value
+    return len(data)
+
+
+@jit(lazy=True)
+def double_all(xs: list[float]) -> int:
+    for i in range(len(xs)):
+        xs[i] *= 2
+    return len(xs)
+
+
+def fill_through_call(xs: list[float], k: float) -> int:
+    # буфер, переданный в другую функцию, тоже считается изменяемым
+    return double_all(xs) + int(k)
+
+
+def test_reads():
+    for backend in ("ctypes", "cpython"):
+        jit_total, jit_ends = jit(backend=backend)(total), jit(backend=backend)(ends)
+        for xs in ([], [5], [1, -2, 3, 40]):
+            for arg in (xs, array.array("i", xs), numpy.array(xs, dtype=numpy.int32)):
+                assert jit_total(arg) == total(xs), f"{backend} total({arg!r})"
+        for xs in ([2.5], [1.0, 2.0, 3.5]):
+            for arg in (xs, array.array("d", xs), numpy.array(xs), memoryview(array.array("d", xs)).toreadonly()):
+                assert jit_ends(arg) == ends(xs), f"{backend} ends({arg!r})"
+
+
+def test_formats():
+    for backend in ("ctypes", "cpython"):
+        jit_total = jit(backend=backend)(total)
+        for arg in (array.array("d", [1.0]), numpy.arange(3, dtype=numpy.int64), bytearray(8), array.array("h", [1])):
+            try:
+                jit_total(arg)
+            except Exception as error:
+                assert "does not match int" in str(error), f"{backend}: {error}"
+            else:
+                raise AssertionError(f"{backend} total({arg!r}) accepted")
+
+
+def test_writes():
+    for backend in ("ctypes", "cpython"):
+        jit_scale, jit_fill = jit(backend=backend)(scale), jit(backend=backend)(fill_bytes)
+        for arg in (array.array("d", [1.0, -2.0]), numpy.array([1.0, -2.0])):
+            assert jit_scale(arg, 3.0) == 2
+            assert list(arg) == [3.0, -6.0], f"{backend} scale({arg!r})"
+        # запись идёт прямо в память numpy-массива, в том числе в срез
+        values = numpy.ones(6)
+        jit_scale(values[2:4], 5.0)
+        assert list(values) == [1.0, 1.0, 5.0, 5.0, 1.0, 1.0], f"{backend} {values}"
+        data = bytearray(b"abc")
+        assert jit_fill(data, 65) == 3 and data == b"AAA", f"{backend} {data}"
+
+
+def test_rejected_copies():
+    for backend in ("ctypes", "cpython"):
+        jit_scale = jit(backend=backend)(scale)
+        for func, arg, message in (
+                (jit_scale, [1.0, 2.0], "lose writes"),
+                (jit_scale, memoryview(array.array("d", [1.0])).toreadonly(), "read-only"),
+                (jit(backend=backend)(fill_bytes), b"abc", "read-only"),
+                (jit(backend=backend)(fill_through_call), [1.0], "lose writes")):
+            try:
+                func(arg, 2)
+            except Exception as error:
+                assert message in str(error), f"{backend} {func.__name__}: {error}"
+            else:
+                raise AssertionError(f"{backend} {func.__name__}({arg!r}) accepted")
+
+
+if __name__ == '__main__':
+    for test in (test_reads, test_formats, test_writes, test_rejected_copies):
+        test()
+        print(test.__name__, "ok")
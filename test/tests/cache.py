@@ -0,0 +1,88 @@
+import contextlib
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from annotation import jit
+from code_to_dll import cache, compiler
+
+# Кэш библиотек: другой набор флагов или другой компилятор дают промах, одноимённые функции разных модулей
+# не пересекаются, а попадание в кэш обходится без запуска компилятора
+
+
+def kernel(n: int) -> int:
+    res: int = 0
+    for i in range(n):
+        res += i % 3
+    return res
+
+
+@contextlib.contextmanager
+def temporary_cache():
+    directory = tempfile.mkdtemp(prefix="metastruct-cache-test-")
+    cache.CACHE_DIR = directory
+    try:
+        yield directory
+    finally:
+        cache.CACHE_DIR = None
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def no_subprocess():
+    def forbidden(*args, **kwargs):
+        raise AssertionError(f"subprocess started on cache hit: {args}")
+    run = subprocess.run
+    subprocess.run = forbidden
+    try:
+        yield
+    finally:
+        subprocess.run = run
+
+
+def test_flags_and_compilers_miss():
+    with temporary_cache() as directory:
+        # скрипт-обёртка над тем же компилятором - другой компилятор для ключа кэша
+        wrapper = os.path.join(directory, "g++-wrapper")
+        with open(wrapper, "w", encoding="utf-8") as outfile:
+            outfile.write(f"#!/bin/sh\nexec {shutil.which(compiler.DEFAULT_COMPILER)} \"$@\"\n")
+        os.chmod(wrapper, 0o755)
+        options = ({}, {"opt_level": 1}, {"fast_math": True}, {"compiler_name": wrapper})
+        for compile_options in options:
+            jit_func = jit(**compile_options)(kernel)
+            assert jit_func.compile_stats.cache_hit is False, compile_options
+            assert jit_func(10) == kernel(10)
+        with no_subprocess():
+            for compile_options in options:
+                jit_func = jit(**compile_options)(kernel)
+                assert jit_func.compile_stats.cache_hit is True, compile_options
+                assert jit_func(10) == kernel(10)
+
+
+def test_same_name_in_modules():
+    with temporary_cache() as directory:
+        for module_name, factor in (("cache_test_first", 2), ("cache_test_second", 3)):
+            with open(os.path.join(directory, f"{module_name}.py"), "w", encoding="utf-8") as outfile:
+                outfile.write(f"def kernel(x: int) -> int:\n    return x * {factor}\n")
+        sys.path.insert(0, directory)
+        try:
+            modules = [importlib.import_module(name) for name in ("cache_test_first", "cache_test_second")]
+        finally:
+            sys.path.remove(directory)
+        first, second = (jit(module.kernel) for module in modules)
+        assert (first(7), second(7)) == (14, 21)
+        with no_subprocess():
+            first, second = (jit(module.kernel) for module in modules)
+        assert first.compile_stats.cache_hit and second.compile_stats.cache_hit
+        assert (first(7), second(7)) == (14, 21)
+        for module in modules:
+            del sys.modules[module.__name__]
+
+
+if __name__ == '__main__':
+    for test in (test_flags_and_compilers_miss, test_same_name_in_modules):
+        test()
+        print(test.__name__, "ok")
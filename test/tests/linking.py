@@ -0,0 +1,64 @@
+from annotation import jit, jit_module
+from test.tests import linking_helpers as helpers
+from test.tests.linking_helpers import clamp, square
+
+# Вызовы скомпилированных функций из других модулей: по имени, через модуль, транзитивно и после jit_module
+
+
+@jit
+def scale(x: int) -> int:
+    return x * 3
+
+
+def via_module(n: int) -> int:
+    return helpers.square(n) + helpers.sum_squares(n)
+
+
+def via_name(x: int) -> int:
+    return clamp(square(x), 0, 50)
+
+
+def same_name(x: int) -> int:
+    # одноимённые функции разных модулей не должны совпасть в единице трансляции
+    return scale(x) * 100 + helpers.scale(x)
+
+
+def mixed(x: float) -> float:
+    return helpers.twice(x) + 0.5
+
+
+cases = {
+    via_module: [(n,) for n in (0, 1, 7)],
+    via_name: [(x,) for x in (-9, 0, 3, 8)],
+    same_name: [(x,) for x in (-2, 0, 4)],
+    mixed: [(x,) for x in (-1.5, 0.0, 2.25)]
+}
+
+
+def check_cases() -> None:
+    for func, args_list in cases.items():
+        jit_func = jit(func)
+        for args in args_list:
+            expected, actual = func(*args), jit_func(*args)
+            assert expected == actual, f"{func.__name__}{args}: {expected} != {actual}"
+
+
+def test_after_jit_module():
+    # запускается до первого вызова ленивых функций: после jit_module имена в модуле указывают на функции
+    # из общей библиотеки, и вызовы должны связываться с ними
+    bound = jit_module(helpers)
+    assert set(bound) == {"clamp", "twice"}, bound
+    for name, jit_func in bound.items():
+        assert getattr(helpers, name) is jit_func, name
+    check_cases()
+
+
+def test_linking():
+    # повторная сборка тех же функций, когда все функции модуля уже скомпилированы
+    check_cases()
+
+
+if __name__ == '__main__':
+    for test in (test_after_jit_module, test_linking):
+        test()
+        print(test.__name__, "ok")
@@ -0,0 +1,35 @@
+from annotation import jit
+
+# Функции для test/tests/linking.py, вызываемые из другого модуля
+
+
+@jit
+def square(x: int) -> int:
+    return x * x
+
+
+@jit
+def sum_squares(n: int) -> int:
+    res: int = 0
+    for i in range(n):
+        res += square(i)
+    return res
+
+
+@jit(lazy=True)
+def clamp(x: int, low: int, high: int) -> int:
+    if x < low:
+        return low
+    if x > high:
+        return high
+    return x
+
+
+@jit(lazy=True, passes=False)
+def twice(x: float) -> float:
+    return x * 2
+
+
+@jit
+def scale(x: int) -> int:
+    return x * 5
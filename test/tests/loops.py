@@ -0,0 +1,68 @@
+from annotation import jit
+
+# Циклы по range: шаг любого знака, шаг из переменной, присваивание переменной цикла и её значение после цикла
+# совпадают с интерпретатором
+
+
+def negative_step(n: int) -> int:
+    res: int = 0
+    for i in range(n, -n, -3):
+        res = res * 2 + i * i - i
+    return res
+
+
+def dynamic_step(start: int, stop: int, step: int) -> int:
+    res: int = 0
+    count: int = 0
+    for i in range(start, stop, step):
+        res += i * count
+        count += 1
+    return res + count
+
+
+def assign_loop_variable(n: int) -> int:
+    res: int = 0
+    for i in range(n):
+        i = i * 2
+        res += i
+    return res
+
+
+def value_after_loop(n: int, step: int) -> int:
+    i: int = -100
+    for i in range(1, n, step):
+        pass
+    return i
+
+
+def nested_value_after_loop(n: int) -> int:
+    res: int = 0
+    j: int = -1
+    for i in range(n):
+        for j in range(i, n, 2):
+            res += j
+    return res * 1000 + j
+
+
+cases = {
+    negative_step: [(n,) for n in (-5, 0, 1, 2, 10, 31)],
+    dynamic_step: [(start, stop, step) for start in (-7, 0, 5) for stop in (-9, 0, 12) for step in (-4, -1, 1, 3)],
+    assign_loop_variable: [(n,) for n in (0, 1, 9)],
+    value_after_loop: [(n, step) for n in (-1, 1, 2, 10) for step in (-2, 1, 3)],
+    nested_value_after_loop: [(n,) for n in (0, 1, 6)]
+}
+
+
+def test_loops():
+    for func, args_list in cases.items():
+        for passes in (None, False):
+            jit_func = jit(passes=passes)(func)
+            for args in args_list:
+                expected, actual = func(*args), jit_func(*args)
+                assert expected == actual, f"{func.__name__}{args} with passes={passes}: {expected} != {actual}"
+
+
+if __name__ == '__main__':
+    for test in (test_loops,):
+        test()
+        print(test.__name__, "ok")
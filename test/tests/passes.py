@@ -0,0 +1,186 @@
+import ast
+import inspect
+import itertools
+
+from annotation import load_jit_tree
+from tree_to_tree.passes import PASSES, optimise
+
+# Проверка того, что проходы оптимизации не меняют поведение функций:
+# исходная и оптимизированная функции выполняются интерпретатором на одних и тех же аргументах,
+# а скомпилированные функции с проходами и без них возвращают одинаковые результаты
+
+
+def identities(x: int, y: float) -> float:
+    a: int = x + 0
+    b: int = 0 + x
+    c: float = y * 1
+    d: int = x * 1 - 0
+    e: int = x - x
+    f: int = (x | 0) ^ 0
+    x = x
+    return a + b + c + d + e + f + y / 1 + (x << 0)
+
+
+def folding(x: int) -> float:
+    a: int = 2 * 3 + 4
+    b: float = 1 / 4
+    c: bool = 3 < 4 and not False
+    d: int = -7 // 2
+    e: int = 5 % 3
+    if c:
+        return a + b + d + e + x
+    return 0
+
+
+def strength(x: int, y: float) -> float:
+    a: int = x * 8
+    b: int = 4 * x
+    c: int = x // 16
+    d: int = x % 32
+    e: float = y / 4
+    f: float = x / 0.5
+    return a + b + c + d + e + f
+
+
+def masks(x: int, n: int) -> int:
+    res: int = x % 8 + x // 4 + x * 2
+    for i in range(n):
+        res += i % 8 + i // 4
+    for j in range(n, 0, -3):
+        res += j % 4 + j // 2
+    return res
+
+
+def dead_code(x: int) -> int:
+    unused: int = x * 2
+    chain: int = unused + 1
+    res: int = 0
+    while False:
+        res += 1
+    if 1 > 2:
+        res = 100
+    else:
+        res = x
+    for i in range(3):
+        res += i
+        continue
+        res += 100
+    return res
+    res = 5
+
+
+def dead_reassign(xs: list[int]) -> int:
+    y: int = 0
+    y = xs[0]
+    return len(xs)
+
+
+def invariant(n: int, k: int) -> int:
+    res: int = 0
+    i: int = 0
+    while i < n:
+        scale: int = k * k + 3
+        step: int = i * scale
+        for j in range(3):
+            offset: int = scale << 2
+            res += step + offset + j
+        i += 1
+    return res
+
+
+def primes(n: int) -> int:
+    count: int = 0
+    number: int = 2
+    while count < n:
+        i: int = 2
+        is_prime: bool = True
+        while i < number:
+            if number % i == 0:
+                is_prime = False
+                break
+            i += 1
+        if is_prime:
+            count += 1
+        number += 1
+    return number - 1
+
+
+cases = {
+    identities: [(x, y) for x in (-5, 0, 7) for y in (-1.5, 0.0, 2.25)],
+    folding: [(x,) for x in (-3, 0, 11)],
+    strength: [(x, y) for x in (-100, -17, -1, 0, 1, 33, 1000) for y in (-3.0, 0.5, 10.0)],
+    masks: [(x, n) for x in (-13, -1, 0, 21) for n in (0, 5, 40)],
+    dead_code: [(x,) for x in (-2, 0, 9)],
+    dead_reassign: [([3, 4],), ([7],)],
+    invariant: [(n, k) for n in (0, 1, 5) for k in (-2, 0, 3)],
+    primes: [(n,) for n in (1, 10, 50)]
+}
+
+
+def compile_optimised(func, passes) -> callable:
+    tree = optimise(ast.parse(inspect.getsource(func)), passes)
+    namespace = {}
+    exec(compile(tree, inspect.getsourcefile(func), "exec"), namespace)
+    return namespace[func.__name__]
+
+
+def check_semantics(passes) -> None:
+    for func, args_list in cases.items():
+        optimised = compile_optimised(func, passes)
+        for args in args_list:
+            expected, actual = func(*args), optimised(*args)
+            assert expected == actual, f"{func.__name__}{args} with {passes}: {expected} != {actual}"
+
+
+def test_all_passes():
+    check_semantics(None)
+
+
+def test_each_pass_alone():
+    for name in PASSES:
+        check_semantics({other: other == name for other in PASSES})
+
+
+def test_passes_toggle():
+    tree = ast.parse(inspect.getsource(strength))
+    assert "<<" in ast.unparse(optimise(tree, {"strength_reduction": True}))
+    assert "<<" not in ast.unparse(optimise(tree, {"strength_reduction": False}))
+    assert optimise(tree, False) is tree
+
+
+def test_pairs_of_passes():
+    for first, second in itertools.combinations(PASSES, 2):
+        check_semantics({name: name in (first, second) for name in PASSES})
+
+
+def test_compiled():
+    # C++ округляет целочисленные деление и остаток к нулю, поэтому результат сравнивается
+    # не с интерпретатором, а со сборкой без проходов
+    configs = [None] + [{other: other == name for other in PASSES} for name in PASSES]
+    for func, args_list in cases.items():
+        tree = ast.parse(inspect.getsource(func))
+        reference = load_jit_tree(tree, func.__name__, passes=False)
+        for passes in configs:
+            compiled = load_jit_tree(tree, func.__name__, passes=passes)
+            for args in args_list:
+                expected, actual = reference(*args), compiled(*args)
+                assert expected == actual, f"compiled {func.__name__}{args} with {passes}: {expected} != {actual}"
+
+
+def test_rewrites():
+    text = ast.unparse(optimise(ast.parse(inspect.getsource(dead_code))))
+    assert "unused" not in text and "while" not in text and "100" not in text
+    text = ast.unparse(optimise(ast.parse(inspect.getsource(invariant))))
+    # вычисления, не зависящие от переменных цикла, выполняются до него
+    assert text.index("scale: int") < text.index("while")
+    assert text.index("offset: int") < text.index("for j")
+    text = ast.unparse(optimise(ast.parse(inspect.getsource(masks))))
+    # маска и сдвиг только для неотрицательных счётчиков цикла
+    assert "x % 8" in text and "x // 4" in text and "i & 7" in text and "i >> 2" in text and "j % 4" in text
+
+
+if __name__ == '__main__':
+    for test in (test_all_passes, test_each_pass_alone, test_passes_toggle, test_pairs_of_passes, test_compiled,
+                 test_rewrites):
+        test()
+        print(test.__name__, "ok")
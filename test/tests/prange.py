@@ -0,0 +1,98 @@
+import ast
+import inspect
+
+from annotation import jit, load_jit_tree, prange, set_num_threads
+
+# Параллельные циклы: редукции дают тот же результат, что и интерпретатор,
+# а записи в общие переменные и выход из цикла отклоняются при компиляции
+
+
+def sum_squares(n: int) -> int:
+    res: int = 0
+    for i in prange(n):
+        res += i * i
+    return res
+
+
+def sum_assign(n: int) -> int:
+    res: int = 0
+    total: float = 0
+    for i in prange(n):
+        res = res + i
+        total = total - i * 0.5
+    return res + int(total)
+
+
+def product_and_mask(n: int) -> int:
+    prod: int = 1
+    mask: int = 0
+    for i in prange(1, n):
+        if i % 97 == 0:
+            prod *= 2
+        mask |= 1 << (i % 20)
+    return prod + mask
+
+
+def nested_loops(n: int) -> int:
+    res: int = 0
+    j: int = 0
+    for i in prange(n):
+        for j in range(i % 5):
+            res += i * j
+    return res
+
+
+def shared_assign(n: int) -> int:
+    last: int = 0
+    for i in prange(n):
+        last = i
+    return last
+
+
+def shared_expression(n: int) -> int:
+    s: int = 0
+    for i in prange(n):
+        s = i + s * 2
+    return s
+
+
+def early_return(n: int) -> int:
+    for i in prange(n):
+        if i == 3:
+            return i
+    return 0
+
+
+def early_break(n: int) -> int:
+    res: int = 0
+    for i in prange(n):
+        if i == 3:
+            break
+        res += i
+    return res
+
+
+def test_reductions():
+    set_num_threads(4)
+    for func in (sum_squares, sum_assign, product_and_mask, nested_loops):
+        jit_func = jit(func)
+        for n in (0, 1, 10, 1000):
+            expected, actual = func(n), jit_func(n)
+            assert expected == actual, f"{func.__name__}({n}): {expected} != {actual}"
+
+
+def test_rejected():
+    for func, message in ((shared_assign, "data race"), (shared_expression, "data race"),
+                          (early_return, "return is not allowed"), (early_break, "break is not allowed")):
+        try:
+            load_jit_tree(ast.parse(inspect.getsource(func)), func.__name__, passes=False)
+        except Exception as error:
+            assert message in str(error), f"{func.__name__}: {error}"
+        else:
+            raise AssertionError(f"{func.__name__} compiled")
+
+
+if __name__ == '__main__':
+    for test in (test_reductions, test_rejected):
+        test()
+        print(test.__name__, "ok")
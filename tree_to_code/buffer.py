@@ -0,0 +1,55 @@
+import ctypes
+import functools
+
+# тип элемента C++ -> (тип ctypes, допустимые форматы буфера)
+item_types = {
+    "double": (ctypes.c_double, "d"),
+    "int": (ctypes.c_int, "il"),
+    "bool": (ctypes.c_bool, "?"),
+    "unsigned char": (ctypes.c_ubyte, None)
+}
+
+
+@functools.lru_cache(maxsize=None)
+def buffer_struct(item_type: str, written: bool = False) -> type:
+    if item_type not in item_types:
+        raise Exception(f"unsupported buffer item type {item_type}")
+    item_ctype, formats = item_types[item_type]
+
+    class Buffer(ctypes.Structure):
+        # раскладка совпадает с шаблоном Buffer<T> из прелюдии генерируемого кода
+        _fields_ = [("data", ctypes.POINTER(item_ctype)), ("len", ctypes.c_longlong)]
+
+        @classmethod
+        def from_param(cls, obj):
+            if isinstance(obj, cls):
+                return obj
+            if isinstance(obj, list):
+                if written:
+                    raise Exception(
+                        f"list argument would be copied and lose writes, pass a writable buffer of {item_type}"
+                    )
+                # у списка нет протокола буфера, поэтому он единственный копируется
+                storage = (item_ctype * len(obj))(*obj)
+                res = cls(ctypes.cast(storage, ctypes.POINTER(item_ctype)), len(obj))
+                res.storage = storage
+                return res
+            view = memoryview(obj)
+            if not view.c_contiguous:
+                raise Exception("buffer argument must be contiguous")
+            if formats is not None and (
+                    view.format.lstrip("@=<>!") not in formats or view.itemsize != ctypes.sizeof(item_ctype)):
+                raise Exception(f"buffer format {view.format} does not match {item_type}")
+            length = view.nbytes // ctypes.sizeof(item_ctype)
+            if view.readonly:
+                if written:
+                    raise Exception("buffer argument is read-only, but the function writes to it")
+                storage = (item_ctype * length).from_buffer_copy(view)
+            else:
+                storage = (item_ctype * length).from_buffer(view)
+            res = cls(ctypes.cast(storage, ctypes.POINTER(item_ctype)), length)
+            res.storage = storage
+            return res
+
+    Buffer.__name__ = f"Buffer_{item_ctype.__name__}"
+    return Buffer
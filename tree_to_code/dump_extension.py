@@ -0,0 +1,219 @@
+from tree_to_code.buffer import item_types
+
+# тип C++ -> (тип переменной, распаковка из PyObject, условие ошибки, упаковка результата)
+unboxing = {
+    "int": ("long", "PyLong_AsLong({0})", "{0} == -1 && PyErr_Occurred()", "PyLong_FromLong"),
+    "double": (
+        "double",
+        "PyFloat_CheckExact({0}) ? PyFloat_AS_DOUBLE({0}) : PyFloat_AsDouble({0})",
+        "{0} == -1.0 && PyErr_Occurred()",
+        "PyFloat_FromDouble"
+    ),
+    "bool": ("int", "PyObject_IsTrue({0})", "{0} < 0", "PyBool_FromLong")
+}
+
+
+# аргументы-буферы проверяются так же, как в Buffer.from_param для ctypes: формат и размер элемента должны совпадать,
+# список и буфер только для чтения копируются (если функция в них не пишет), остальные объекты с протоколом буфера
+# передаются без копирования
+BUFFER_HELPERS = """template <typename T>
+static int unbox_item(PyObject *obj, T *res) {
+    long value = PyLong_AsLong(obj);
+    if (value == -1 && PyErr_Occurred()) return -1;
+    *res = (T)value;
+    return 0;
+}
+
+template <>
+int unbox_item<double>(PyObject *obj, double *res) {
+    *res = PyFloat_AsDouble(obj);
+    return *res == -1.0 && PyErr_Occurred() ? -1 : 0;
+}
+
+template <>
+int unbox_item<bool>(PyObject *obj, bool *res) {
+    int value = PyObject_IsTrue(obj);
+    if (value < 0) return -1;
+    *res = value;
+    return 0;
+}
+
+struct ArgBuffer {
+    Py_buffer view;
+    bool has_view;
+    void *copy;
+};
+
+template <typename T>
+static int get_buffer(PyObject *obj, const char *formats, const char *type_name, bool written, ArgBuffer &arg,
+                      Buffer<T> &res) {
+    if (PyList_Check(obj)) {
+        if (written) {
+            PyErr_Format(PyExc_TypeError, "list argument would be copied and lose writes, pass a writable buffer of %s",
+                         type_name);
+            return -1;
+        }
+        Py_ssize_t len = PyList_GET_SIZE(obj);
+        T *data = (T *)PyMem_Malloc(len * sizeof(T) + 1);
+        if (data == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        arg.copy = data;
+        for (Py_ssize_t i = 0; i < len; i++) {
+            if (unbox_item(PyList_GET_ITEM(obj, i), &data[i]) < 0) return -1;
+        }
+        res = {data, len};
+        return 0;
+    }
+    if (PyObject_GetBuffer(obj, &arg.view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) return -1;
+    arg.has_view = true;
+    const char *format = arg.view.format == NULL ? "B" : arg.view.format;
+    while (*format && strchr("@=<>!", *format)) format++;
+    if (formats != NULL && (format[0] == 0 || format[1] != 0 || strchr(formats, format[0]) == NULL ||
+                            arg.view.itemsize != (Py_ssize_t)sizeof(T))) {
+        PyErr_Format(PyExc_TypeError, "buffer format %s does not match %s", arg.view.format, type_name);
+        return -1;
+    }
+    res = {(T *)arg.view.buf, arg.view.len / (Py_ssize_t)sizeof(T)};
+    if (arg.view.readonly) {
+        if (written) {
+            PyErr_SetString(PyExc_TypeError, "buffer argument is read-only, but the function writes to it");
+            return -1;
+        }
+        // функция может изменять элементы, неизменяемый объект не должен меняться
+        void *data = PyMem_Malloc(arg.view.len + 1);
+        if (data == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        memcpy(data, arg.view.buf, arg.view.len);
+        arg.copy = data;
+        res.data = (T *)data;
+    }
+    return 0;
+}
+
+static void release_buffer(ArgBuffer &arg) {
+    if (arg.has_view) PyBuffer_Release(&arg.view);
+    PyMem_Free(arg.copy);
+}
+
+"""
+
+
+# функции модуля - объекты собственного типа с vectorcall: вызов так же быстр, как у встроенной функции, а через
+# словарь экземпляра к функции можно добавить атрибуты (compile_stats, parallel_map)
+FUNCTION_TYPE = """typedef struct {
+    PyObject_HEAD
+    vectorcallfunc vectorcall;
+    PyObject *dict;
+} JitFunction;
+
+static void function_dealloc(JitFunction *self) {
+    Py_XDECREF(self->dict);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject function_type = {PyVarObject_HEAD_INIT(NULL, 0)};
+
+static int init_function_type(void) {
+    function_type.tp_name = "metastruct.JitFunction";
+    function_type.tp_basicsize = sizeof(JitFunction);
+    function_type.tp_dealloc = (destructor)function_dealloc;
+    function_type.tp_vectorcall_offset = offsetof(JitFunction, vectorcall);
+    function_type.tp_call = PyVectorcall_Call;
+    function_type.tp_getattro = PyObject_GenericGetAttr;
+    function_type.tp_setattro = PyObject_GenericSetAttr;
+    function_type.tp_dictoffset = offsetof(JitFunction, dict);
+    function_type.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_VECTORCALL;
+    return PyType_Ready(&function_type);
+}
+
+static int add_function(PyObject *module, const char *name, vectorcallfunc vectorcall) {
+    JitFunction *func = PyObject_New(JitFunction, &function_type);
+    if (func == NULL) return -1;
+    func->vectorcall = vectorcall;
+    func->dict = NULL;
+    PyObject *func_name = PyUnicode_FromString(name);
+    if (func_name == NULL || PyObject_SetAttrString((PyObject *)func, "__name__", func_name) < 0 ||
+        PyModule_AddObject(module, name, (PyObject *)func) < 0) {
+        Py_XDECREF(func_name);
+        Py_DECREF(func);
+        return -1;
+    }
+    Py_DECREF(func_name);
+    return 0;
+}
+
+"""
+
+
+def dump_extension(module_name: str, text: str, signatures: dict) -> str:
+    res = "#define PY_SSIZE_T_CLEAN\n#include <Python.h>\n#include <stddef.h>\n\n" + text + "\n"
+    if any(arg_type.startswith("Buffer<") for signature in signatures.values()
+           for arg_type in signature["cpp_argtypes"]):
+        res += BUFFER_HELPERS
+    res += FUNCTION_TYPE
+    functions = ""
+    for name, signature in signatures.items():
+        res += dump_wrapper(name, signature)
+        functions += f"    if (add_function(res, \"{name}\", wrap_{name}) < 0) {{ Py_DECREF(res); return NULL; }}\n"
+    res += (
+        f"static struct PyModuleDef module = {{PyModuleDef_HEAD_INIT, \"{module_name}\", NULL, -1, NULL}};\n\n"
+        f"PyMODINIT_FUNC PyInit_{module_name}(void) {{\n"
+        f"    if (init_function_type() < 0) return NULL;\n"
+        f"    PyObject *res = PyModule_Create(&module);\n"
+        f"    if (res == NULL) return NULL;\n"
+        f"{functions}"
+        f"    return res;\n"
+        f"}}\n"
+    )
+    return res
+
+
+def dump_wrapper(name: str, signature: dict) -> str:
+    argtypes = signature["cpp_argtypes"]
+    res = (
+        f"static PyObject *wrap_{name}(PyObject *self, PyObject *const *args, size_t nargsf, PyObject *kwnames) {{\n"
+        f"    Py_ssize_t nargs = PyVectorcall_NARGS(nargsf);\n"
+        f"    if (kwnames != NULL && PyTuple_GET_SIZE(kwnames) != 0) {{\n"
+        f"        PyErr_SetString(PyExc_TypeError, \"{name}() takes no keyword arguments\");\n"
+        f"        return NULL;\n"
+        f"    }}\n"
+        f"    if (nargs != {len(argtypes)}) {{\n"
+        f"        PyErr_Format(PyExc_TypeError, \"{name}() takes {len(argtypes)} arguments (%zd given)\", nargs);\n"
+        f"        return NULL;\n"
+        f"    }}\n"
+    )
+    views = []
+    for i, arg_type in enumerate(argtypes):
+        release = "".join(f"release_buffer(buffer{view}); " for view in views)
+        if arg_type.startswith("Buffer<"):
+            item_type = arg_type[len("Buffer<"):-1]
+            if item_type not in item_types:
+                raise Exception(f"unsupported buffer item type {item_type}")
+            formats = item_types[item_type][1]
+            formats = "NULL" if formats is None else f"\"{formats}\""
+            written = "true" if signature["written"][i] else "false"
+            res += (
+                f"    ArgBuffer buffer{i} = {{}};\n"
+                f"    {arg_type} arg{i};\n"
+                f"    if (get_buffer(args[{i}], {formats}, \"{item_type}\", {written}, buffer{i}, arg{i}) < 0) {{ "
+                f"{release}release_buffer(buffer{i}); return NULL; }}\n"
+            )
+            views.append(i)
+            continue
+        if arg_type not in unboxing:
+            raise Exception(f"unsupported type str {arg_type}")
+        var_type, unbox, error, _ = unboxing[arg_type]
+        res += (
+            f"    {var_type} arg{i} = {unbox.format(f'args[{i}]')};\n"
+            f"    if ({error.format(f'arg{i}')}) {{ {release}return NULL; }}\n"
+        )
+    box = unboxing[signature["cpp_restype"]][3]
+    call_args = ", ".join(f"arg{i}" for i in range(len(argtypes)))
+    res += f"    PyObject *res = {box}({name}({call_args}));\n"
+    res += "".join(f"    release_buffer(buffer{view});\n" for view in views)
+    res += "    return res;\n}\n\n"
+    return res
@@ -1,11 +1,66 @@
 import ast
 from ast import *
-from typing import Any, Tuple, Iterable
+from typing import Any, Tuple, Iterable, List, Set
 import ctypes
 
+from tree_to_code.buffer import buffer_struct
+
+# версия генератора кода, входит в ключ кэша скомпилированных библиотек
+BACKEND_VERSION = "10"
+
+# общая часть всех генерируемых модулей
+PRELUDE = """template <typename T>
+struct Buffer {
+    T *data;
+    long long len;
+    // отрицательный индекс отсчитывается от конца, как в Python
+    T &operator[](long long i) { return data[i < 0 ? i + len : i]; }
+};
+
+"""
+
+# заголовки идут в начале модуля, чтобы попасть в предкомпилированный заголовок
+PROFILE_INCLUDES = """#include <chrono>
+
+"""
+
+# счётчики вызовов и времени для режима профилирования; время измеряется только во внешнем вызове функции,
+# рекурсивные вызовы увеличивают лишь число вызовов
+PROFILE_PRELUDE = """struct ProfileCounter {
+    unsigned long long calls;
+    unsigned long long nanoseconds;
+};
+
+struct ProfileGuard {
+    ProfileCounter &counter;
+    int &depth;
+    std::chrono::steady_clock::time_point start;
+    ProfileGuard(ProfileCounter &counter, int &depth) : counter(counter), depth(depth) {
+        __atomic_fetch_add(&counter.calls, 1, __ATOMIC_RELAXED);
+        if (depth++ == 0) start = std::chrono::steady_clock::now();
+    }
+    ~ProfileGuard() {
+        if (--depth == 0) {
+            auto elapsed = std::chrono::steady_clock::now() - start;
+            __atomic_fetch_add(&counter.nanoseconds,
+                               std::chrono::duration_cast<std::chrono::nanoseconds>(elapsed).count(),
+                               __ATOMIC_RELAXED);
+        }
+    }
+};
+
+"""
+
+
+def dump_cpp(tree: ast.Module, internal: Set[str] = frozenset(), profile: bool = False) -> Tuple[str, dict]:
+    text, signatures = DumpVisitor(internal, profile).visit(tree)
+    if profile:
+        return PROFILE_INCLUDES + PRELUDE + PROFILE_PRELUDE + text, signatures
+    return PRELUDE + text, signatures
+
 
 def dump_cpp_text(tree: ast.Module = None, filename: str = None) -> dict:
-    text, signatures = DumpVisitor().visit(tree)
+    text, signatures = dump_cpp(tree)
     with open(filename, "w", encoding="utf-8") as outfile:
         outfile.write(text)
     return signatures
@@ -23,7 +78,9 @@ def dump_type(str_type: str) -> str:
             raise Exception(f"unsupported type {str_type}")
 
 
-def ctype_convert(type_str: str):
+def ctype_convert(type_str: str, written: bool = False):
+    if type_str.startswith("Buffer<"):
+        return buffer_struct(type_str[len("Buffer<"):-1], written)
     match type_str:
         case "int":
             return ctypes.c_int
@@ -35,77 +92,373 @@ def ctype_convert(type_str: str):
             raise Exception(f"unsupported type str {type_str}")
 
 
-class DumpVisitor(ast.NodeVisitor):
-    def __init__(self):
-        pass
+def dump_batch(name: str, signature: dict) -> str:
+    # пакетный вариант функции обрабатывает целую порцию аргументов за один вызов из Python
+    args = "".join(f"const {arg_type} *arg{i}, " for i, arg_type in enumerate(signature["cpp_argtypes"]))
+    call_args = ", ".join(f"arg{i}[i]" for i in range(len(signature["cpp_argtypes"])))
+    return (
+        f"extern \"C\" void {name}__batch(long long n, {args}{signature['cpp_restype']} *res) {{\n"
+        f"    for (long long i = 0; i < n; i++) {{\n"
+        f"        res[i] = {name}({call_args});\n"
+        f"    }}\n"
+        f"}}\n"
+    )
+
+
+def dump_loop(name: str, loop_name: str, in_types: List[str], out_type: str) -> str:
+    # обход массивов произвольной размерности с шагами в байтах, как у ufunc из numpy:
+    # внутренний цикл идёт по последней оси, внешние оси перебираются как разряды счётчика
+    operands = len(in_types) + 1
+    call_args = ", ".join(
+        f"*({in_type} *)(ptr[{k}] + i * strides[{k} * ndim + ndim - 1])" for k, in_type in enumerate(in_types)
+    )
+    out = len(in_types)
+    return (
+        f"extern \"C\" void {loop_name}(int ndim, const long long *shape, char **data, const long long *strides) {{\n"
+        f"    char *ptr[{operands}];\n"
+        f"    long long index[64] = {{0}};\n"
+        f"    long long total = 1;\n"
+        f"    for (int k = 0; k < {operands}; k++) ptr[k] = data[k];\n"
+        f"    for (int d = 0; d < ndim; d++) total *= shape[d];\n"
+        f"    long long inner = ndim ? shape[ndim - 1] : 1;\n"
+        f"    for (long long done = 0; done < total; done += inner) {{\n"
+        f"        for (long long i = 0; i < inner; i++) {{\n"
+        f"            *({out_type} *)(ptr[{out}] + i * strides[{out} * ndim + ndim - 1]) = {name}({call_args});\n"
+        f"        }}\n"
+        f"        for (int d = ndim - 2; d >= 0; d--) {{\n"
+        f"            index[d]++;\n"
+        f"            for (int k = 0; k < {operands}; k++) ptr[k] += strides[k * ndim + d];\n"
+        f"            if (index[d] < shape[d]) break;\n"
+        f"            for (int k = 0; k < {operands}; k++) ptr[k] -= strides[k * ndim + d] * shape[d];\n"
+        f"            index[d] = 0;\n"
+        f"        }}\n"
+        f"    }}\n"
+        f"}}\n"
+    )
+
+
+# операции составного присваивания, которые переводятся в редукции OpenMP
+reduction_ops = {
+    Add: "+",
+    Sub: "+",
+    Mult: "*",
+    BitAnd: "&",
+    BitOr: "|",
+    BitXor: "^"
+}
+
+
+def has_break(nodes: Iterable[stmt]) -> bool:
+    # break во вложенных циклах относится к ним самим
+    for node in nodes:
+        match node:
+            case Break():
+                return True
+            case If(body=body, orelse=orelse) if has_break(body) or has_break(orelse):
+                return True
+    return False
+
+
+def loop_locals(node: For) -> Set[str]:
+    # переменные, объявленные внутри цикла, и переменные вложенных циклов локальны для каждой итерации
+    return {
+        elem.target.id for elem in ast.walk(node)
+        if isinstance(elem, (AnnAssign, For)) and isinstance(elem.target, Name)
+    }
+
+
+def written_buffers(node: FunctionDef, names: Set[str]) -> Set[str]:
+    # буфер считается изменяемым, если в него пишут или передают его дальше: запись в копию списка потерялась бы
+    res = set()
+    for elem in ast.walk(node):
+        match elem:
+            case Subscript(value=Name(id=name), ctx=Store()) if name in names:
+                res.add(name)
+            case Call(func=func, args=args) if not (isinstance(func, Name) and func.id == "len"):
+                res.update(arg.id for arg in args if isinstance(arg, Name) and arg.id in names)
+            case Assign(value=Name(id=name)) | AnnAssign(value=Name(id=name)) if name in names:
+                res.add(name)
+    return res
+
+
+def add_reduction(reductions: dict, var: str, op: operator) -> None:
+    if type(op) not in reduction_ops:
+        raise Exception(f"unsupported reduction {type(op).__name__} on {var} in prange loop")
+    op_sign = reduction_ops[type(op)]
+    if reductions.setdefault(var, op_sign) != op_sign:
+        raise Exception(f"conflicting reductions on {var} in prange loop")
+
+
+def dump_reductions(node: For) -> str:
+    local = loop_locals(node)
+    if has_break(node.body):
+        raise Exception("break is not allowed in prange loop")
+    if any(isinstance(elem, Return) for elem in ast.walk(node)):
+        raise Exception("return is not allowed in prange loop")
+    reductions = {}
+    for elem in ast.walk(node):
+        match elem:
+            case AugAssign(target=Name(id=var), op=op) if var not in local:
+                add_reduction(reductions, var, op)
+            # `x = x + e` записывается так же, как `x += e`
+            case Assign(targets=[Name(id=var)], value=BinOp(left=Name(id=left), op=op, right=right)) \
+                    if var not in local and left == var and var not in {
+                        name.id for name in ast.walk(right) if isinstance(name, Name)}:
+                add_reduction(reductions, var, op)
+            case Assign(targets=targets):
+                for target in targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, Name) and isinstance(name.ctx, Store) and name.id not in local:
+                            raise Exception(f"assignment to {name.id} in prange loop is a data race, "
+                                            f"only reductions like `{name.id} += ...` are allowed")
+    by_op = {}
+    for var, op_sign in reductions.items():
+        by_op.setdefault(op_sign, []).append(var)
+    return "".join(f" reduction({op_sign}:{', '.join(names)})" for op_sign, names in by_op.items())
+
+
+# знаки операций C++ по типу узла операции
+operators = {
+    Add: "+",
+    Sub: "-",
+    Mult: "*",
+    Div: "/",
+    FloorDiv: "/",
+    Mod: "%",
+    LShift: "<<",
+    RShift: ">>",
+    BitAnd: "&",
+    BitOr: "|",
+    BitXor: "^",
+    Eq: "==",
+    NotEq: "!=",
+    Lt: "<",
+    LtE: "<=",
+    Gt: ">",
+    GtE: ">=",
+    UAdd: "+",
+    USub: "-",
+    Not: "!",
+    Invert: "~",
+    And: "&&",
+    Or: "||"
+}
+
+
+def dump_operator(op: AST) -> str:
+    sign = operators.get(type(op))
+    if sign is None:
+        raise Exception(f"unsupported operator {type(op).__name__}")
+    return sign
+
+
+class DumpVisitor:
+    # операторы записываются построчно в общий буфер с текущим отступом, выражения возвращаются строками;
+    # обработчик узла выбирается по таблице emitters, заполненной после определения класса
+    def __init__(self, internal: Set[str] = frozenset(), profile: bool = False):
+        # функции, подключённые из других модулей: не экспортируются из библиотеки
+        self.internal = internal
+        # счётчики вызовов экспортируемых функций, которые читает metastruct.profile
+        self.profile = profile
+        self.uses_openmp = False
+        self.lines: List[str] = []
+        self.indent = ""
+        # переменные, объявленные в текущем блоке и объемлющих блоках функции
+        self.declared: Set[str] = set()
+
+    def visit(self, node: AST) -> Any:
+        emitter = emitters.get(type(node))
+        if emitter is None:
+            raise Exception(f"unsupported node {type(node).__name__}")
+        return emitter(self, node)
+
+    def write(self, line: str) -> None:
+        self.lines.append(self.indent + line + "\n")
+
+    def dump_body(self, nodes: Iterable[stmt]) -> None:
+        indent, declared = self.indent, set(self.declared)
+        self.indent += "    "
+        for node in nodes:
+            self.visit(node)
+        self.indent, self.declared = indent, declared
 
     def visit_Module(self, node: Module) -> Tuple[str, dict]:
-        res, signatures = "", {}
-        for elem in node.body:
-            match elem:
-                case FunctionDef(name=name):
-                    func_text, signature = self.visit(elem)
-                    res += func_text + "\n"
-                    signatures[name] = signature
-        return res, signatures
-
-    def visit_FunctionDef(self, node: FunctionDef) -> Tuple[str, dict]:
-        ret_type = self.visit(node.returns)
-        name = node.name
-        args, args_signature = [], []
-        for arg in node.args.args:
-            arg, arg_type = self.visit(arg)
-            args.append(f"{arg_type} {arg}")
-            args_signature.append(ctype_convert(arg_type))
-        args = ", ".join(args)
-        res = f"extern \"C\" {ret_type} {name}({args}) {{\n"
-        res += self.dump_body(node.body) + "}"
-        signature = {
+        functions = [elem for elem in node.body if isinstance(elem, FunctionDef)]
+        signatures, internal_signatures = {}, {}
+        for func in functions:
+            signature = self.dump_signature(func)
+            if func.name in self.internal:
+                internal_signatures[func.name] = signature
+            else:
+                signatures[func.name] = signature
+        # объявления позволяют функциям модуля вызывать друг друга независимо от порядка определения
+        for signature in [*signatures.values(), *internal_signatures.values()]:
+            self.write(signature["declaration"] + ";")
+        for func in functions:
+            signature = signatures.get(func.name) or internal_signatures[func.name]
+            self.dump_function(func, signature)
+            if func.name in signatures and not any(arg_type.startswith("Buffer<")
+                                                   for arg_type in signature["cpp_argtypes"]):
+                self.lines.append(dump_batch(func.name, signature))
+        # библиотека собирается с -fopenmp, если параллельные циклы есть хотя бы в одной подключённой функции
+        if any(signature["openmp"] for signature in internal_signatures.values()):
+            for signature in signatures.values():
+                signature["openmp"] = True
+        return "".join(self.lines), signatures
+
+    def dump_signature(self, node: FunctionDef) -> dict:
+        ret_type = self.dump_annotation(node.returns)
+        if ret_type.startswith("Buffer<"):
+            raise Exception(f"unsupported return type {ret_type}")
+        args, args_signature, cpp_argtypes = [], [], []
+        arg_types = [self.dump_annotation(arg.annotation) for arg in node.args.args]
+        written = written_buffers(node, {
+            arg.arg for arg, arg_type in zip(node.args.args, arg_types) if arg_type.startswith("Buffer<")
+        })
+        for arg, arg_type in zip(node.args.args, arg_types):
+            args.append(f"{arg_type} {arg.arg}")
+            args_signature.append(ctype_convert(arg_type, arg.arg in written))
+            cpp_argtypes.append(arg_type)
+        linkage = "static inline" if node.name in self.internal else "extern \"C\""
+        return {
+            "declaration": f"{linkage} {ret_type} {node.name}({', '.join(args)})",
             "argtypes": args_signature,
-            "restype": ctype_convert(ret_type)
+            "restype": ctype_convert(ret_type),
+            "cpp_argtypes": cpp_argtypes,
+            "cpp_restype": ret_type,
+            "written": [arg.arg in written for arg in node.args.args],
+            "openmp": False
         }
-        return res, signature
 
-    def visit_arg(self, node: arg) -> Tuple[str, str]:
-        return node.arg, self.visit(node.annotation)
+    def dump_function(self, node: FunctionDef, signature: dict) -> None:
+        self.uses_openmp = False
+        profiled = self.profile and node.name not in self.internal
+        if profiled:
+            self.write(f"extern \"C\" {{ ProfileCounter {node.name}__profile = {{0, 0}}; }}")
+            self.write(f"static thread_local int {node.name}__depth = 0;")
+        self.write(signature["declaration"] + " {")
+        self.declared = {arg.arg for arg in node.args.args}
+        if profiled:
+            self.write(f"    ProfileGuard _profile_guard({node.name}__profile, {node.name}__depth);")
+        self.dump_body(node.body)
+        self.write("}")
+        signature["openmp"] = self.uses_openmp
+
+    def dump_annotation(self, node: expr) -> str:
+        match node:
+            case Name(id="memoryview"):
+                return "Buffer<unsigned char>"
+            case Subscript(value=Name(id="list"), slice=Name(id=item_type)):
+                return f"Buffer<{dump_type(item_type)}>"
+            case Name(id=str_type):
+                return dump_type(str_type)
+            case _:
+                raise Exception(f"unsupported annotation {ast.dump(node) if node else None}")
+
+    def visit_While(self, node: While) -> None:
+        self.write(f"while ({self.visit(node.test)}) {{")
+        self.dump_body(node.body)
+        self.write("}")
 
-    def dump_body(self, nodes: Iterable[stmt]) -> str:
-        res = ""
-        for node in nodes:
-            match node:
-                case While() | If():
-                    res += self.visit(node)
-                case _:
-                    res += self.visit(node) + ";\n"
-        space = " " * 4
-        res = space + res.replace("\n", "\n" + space).rstrip(space)
-        return res
-
-    def visit_While(self, node: While) -> str:
-        condition = self.visit(node.test)
-        res = f"while {condition} {{\n"
-        res += self.dump_body(node.body) + "}\n"
-        return res
-
-    def visit_If(self, node: If) -> str:
-        condition = self.visit(node.test)
-        res = f"if ({condition}) {{\n"
-        res += self.dump_body(node.body) + "}\n"
-        match orelse := node.orelse:
-            case If():
-                res += self.visit(orelse)
-            case []:
+    def visit_For(self, node: For) -> None:
+        match node:
+            case For(target=Name(id=var), iter=Call(func=Name(id="range" | "prange" as range_func), args=range_args),
+                     orelse=[]):
                 pass
             case _:
-                else_body = self.dump_body(orelse)
-                res += f"{{\n{else_body}}}\n"
-        return res
+                raise Exception("unsupported for loop, only `for i in range(...)` is supported")
+        match range_args:
+            case [stop]:
+                start, step = Constant(value=0), Constant(value=1)
+            case [start, stop]:
+                step = Constant(value=1)
+            case [start, stop, step]:
+                pass
+            case _:
+                raise Exception(f"range expected at most 3 arguments, got {len(range_args)}")
+        # границы вычисляются один раз, как в range, и цикл получает канонический вид для векторизации;
+        # OpenMP требует объявления одной переменной цикла и сам вычисляет число итераций один раз.
+        # Цикл идёт по скрытому счётчику: присваивания переменной цикла в теле не меняют число итераций
+        counter = f"_i_{var}"
+        if range_func == "prange":
+            header, bound = f"int {counter} = {self.visit(start)}", self.visit(stop)
+        else:
+            header, bound = f"int {counter} = {self.visit(start)}, _stop_{var} = {self.visit(stop)}", f"_stop_{var}"
+        match step:
+            case Constant(value=int(value)) | UnaryOp(op=UAdd(), operand=Constant(value=int(value))):
+                pass
+            case UnaryOp(op=USub(), operand=Constant(value=int(value))):
+                value = -value
+            case _:
+                value = None
+        if value == 0:
+            raise Exception("range() arg 3 must not be zero")
+        if value is None:
+            if range_func == "prange":
+                raise Exception("prange() step must be a constant")
+            header += f", _step_{var} = {self.visit(step)}"
+            condition = f"(_step_{var} > 0 ? {counter} < {bound} : {counter} > {bound})"
+            increment = f"{counter} += _step_{var}"
+        else:
+            condition = f"{counter} {'<' if value > 0 else '>'} {bound}"
+            increment = {1: f"{counter}++", -1: f"{counter}--"}.get(
+                value, f"{counter} {'+=' if value > 0 else '-='} {abs(value)}")
+        declared = self.declared
+        if range_func == "prange":
+            self.uses_openmp = True
+            self.write(f"#pragma omp parallel for{dump_reductions(node)}")
+            # переменные вложенных циклов объявляются в каждой итерации, а не присваиваются общей переменной
+            self.declared = declared - loop_locals(node)
+        self.write(f"for ({header}; {condition}; {increment}) {{")
+        # объявленная до цикла переменная сохраняет последнее значение после цикла, как в Python;
+        # в параллельном цикле у каждой итерации своя переменная
+        if var in self.declared and range_func != "prange":
+            self.write(f"    {var} = {counter};")
+        else:
+            self.write(f"    int {var} = {counter};")
+        self.dump_body(node.body)
+        self.declared = declared
+        self.write("}")
+
+    def visit_If(self, node: If) -> None:
+        self.write(f"if ({self.visit(node.test)}) {{")
+        self.dump_body(node.body)
+        orelse = node.orelse
+        # цепочка elif записывается как else if без вложенных блоков
+        while len(orelse) == 1 and isinstance(orelse[0], If):
+            self.write(f"}} else if ({self.visit(orelse[0].test)}) {{")
+            self.dump_body(orelse[0].body)
+            orelse = orelse[0].orelse
+        if orelse:
+            self.write("} else {")
+            self.dump_body(orelse)
+        self.write("}")
+
+    def visit_AnnAssign(self, node: AnnAssign) -> None:
+        if isinstance(node.target, Name):
+            self.declared.add(node.target.id)
+        self.write(f"{self.dump_annotation(node.annotation)} {self.visit(node.target)} = {self.visit(node.value)};")
+
+    def visit_Assign(self, node: Assign) -> None:
+        self.write(f"{self.visit(node.targets[0])} = {self.visit(node.value)};")
+
+    def visit_AugAssign(self, node: AugAssign) -> None:
+        self.write(f"{self.visit(node.target)} {dump_operator(node.op)}= {self.visit(node.value)};")
+
+    def visit_Return(self, node: Return) -> None:
+        self.write(f"return {self.visit(node.value)};")
+
+    def visit_Expr(self, node: Expr) -> None:
+        self.write(f"{self.visit(node.value)};")
+
+    def visit_Pass(self, node: Pass) -> None:
+        pass
 
-    def visit_AnnAssign(self, node: AnnAssign) -> str:
-        return f"{self.visit(node.annotation)} {self.visit(node.target)} = {self.visit(node.value)}"
+    def visit_Break(self, node: Break) -> None:
+        self.write("break;")
 
-    def visit_Assign(self, node: Assign) -> str:
-        return f"{self.visit(node.targets[0])} = {self.visit(node.value)}"
+    def visit_Continue(self, node: Continue) -> None:
+        self.write("continue;")
 
     def visit_Constant(self, node: Constant) -> str:
         match node:
@@ -116,12 +469,6 @@ class DumpVisitor(ast.NodeVisitor):
             case _:
                 return str(node.value)
 
-    def visit_UnaryOp(self, node: UnaryOp) -> str:
-        return f"{self.visit(node.op)}{self.visit(node.operand)}"
-
-    def visit_BinOp(self, node: BinOp) -> str:
-        return f"({self.visit(node.left)} {self.visit(node.op)} {self.visit(node.right)})"
-
     def visit_Name(self, node: Name) -> str:
         match node.id:
             case "int" | "bool" | "float":
@@ -129,93 +476,38 @@ class DumpVisitor(ast.NodeVisitor):
             case _:
                 return node.id
 
-    def visit_BoolOp(self, node: BoolOp) -> str:
-        return f"({self.visit(node.values[0])} {self.visit(node.op)} {self.visit(node.values[1])})"
+    def visit_UnaryOp(self, node: UnaryOp) -> str:
+        return f"{dump_operator(node.op)}{self.visit(node.operand)}"
 
-    def visit_Return(self, node: Return) -> str:
-        return f"return {self.visit(node.value)}"
+    def visit_BinOp(self, node: BinOp) -> str:
+        if isinstance(node.op, Div):
+            # деление в Python всегда вещественное, в том числе для специализаций с целыми аргументами
+            return f"((double){self.visit(node.left)} / {self.visit(node.right)})"
+        return f"({self.visit(node.left)} {dump_operator(node.op)} {self.visit(node.right)})"
 
-    def visit_AugAssign(self, node: AugAssign) -> str:
-        return f"{self.visit(node.target)} {self.visit(node.op)}= {self.visit(node.value)}"
+    def visit_BoolOp(self, node: BoolOp) -> str:
+        return "(" + f" {dump_operator(node.op)} ".join(map(self.visit, node.values)) + ")"
 
     def visit_Compare(self, node: Compare) -> str:
-        return f"({self.visit(node.left)} {self.visit(node.ops[0])} {self.visit(node.comparators[0])})"
+        # цепочка сравнений a < b < c записывается как (a < b && b < c)
+        operands = [self.visit(node.left), *map(self.visit, node.comparators)]
+        return "(" + " && ".join(
+            f"{left} {dump_operator(op)} {right}" for left, op, right in zip(operands, node.ops, operands[1:])
+        ) + ")"
 
     def visit_Call(self, node: Call) -> str:
+        match node:
+            case Call(func=Name(id="len"), args=[buffer]):
+                return f"{self.visit(buffer)}.len"
         args = ", ".join(map(self.visit, node.args))
         return f"{self.visit(node.func)}({args})"
 
-    def visit_Break(self, node: Break) -> str:
-        return "break"
-
-    def visit_Continue(self, node: Continue) -> str:
-        return "continue"
-
-    def visit_Add(self, node: Add) -> str:
-        return "+"
-
-    def visit_Sub(self, node: Sub) -> str:
-        return "-"
-
-    def visit_Div(self, node: Div) -> str:
-        return "/"
-
-    def visit_FloorDiv(self, node: FloorDiv) -> str:
-        return "/"
-
-    def visit_Mult(self, node: Mult) -> str:
-        return "*"
-
-    def visit_Mod(self, node: Mod) -> str:
-        return "%"
-
-    def visit_LShift(self, node: LShift) -> str:
-        return "<<"
-
-    def visit_RShift(self, node: RShift) -> str:
-        return ">>"
-
-    def visit_BitAnd(self, node: BitAnd) -> str:
-        return "&"
-
-    def visit_BitOr(self, node: BitOr) -> str:
-        return "|"
-
-    def visit_BitXor(self, node: BitXor) -> str:
-        return "^"
-
-    def visit_Eq(self, node: Eq) -> str:
-        return "=="
-
-    def visit_NotEq(self, node: NotEq) -> str:
-        return "!="
-
-    def visit_Lt(self, node: Lt) -> str:
-        return "<"
-
-    def visit_LtE(self, node: LtE) -> str:
-        return "<="
-
-    def visit_Gt(self, node: Gt) -> str:
-        return ">"
-
-    def visit_GtE(self, node: GtE) -> str:
-        return ">="
-
-    def visit_UAdd(self, node: UAdd) -> str:
-        return "+"
-
-    def visit_USub(self, node: USub) -> str:
-        return "-"
-
-    def visit_Not(self, node: Not) -> str:
-        return "!"
-
-    def visit_Invert(self, node: Invert) -> str:
-        return "~"
+    def visit_Subscript(self, node: Subscript) -> str:
+        return f"{self.visit(node.value)}[{self.visit(node.slice)}]"
 
-    def visit_And(self, node: And) -> str:
-        return "&&"
 
-    def visit_Or(self, node: Or) -> str:
-        return "||"
+# тип узла -> обработчик, без поиска метода по имени при каждом вызове
+emitters = {
+    getattr(ast, name[len("visit_"):]): method
+    for name, method in vars(DumpVisitor).items() if name.startswith("visit_")
+}
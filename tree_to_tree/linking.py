@@ -0,0 +1,69 @@
+import ast
+import copy
+import inspect
+from ast import *
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from tree_to_tree.passes import optimise
+
+# скомпилированные функции: id объекта, доступного по имени в модуле -> (объект, исходная функция, проходы)
+# ключом служит id, потому что указатели на функции ctypes не хешируются
+registry: Dict[int, Tuple[Any, Callable, Optional[Dict[str, bool]] | bool]] = {}
+
+
+def register(jit_object: Any, func: Callable, passes: Optional[Dict[str, bool]] | bool = None) -> None:
+    registry[id(jit_object)] = (jit_object, func, passes)
+
+
+def lookup(value: Any) -> Optional[Tuple[Callable, Optional[Dict[str, bool]] | bool]]:
+    entry = registry.get(id(value))
+    if entry is None or entry[0] is not value:
+        return None
+    return entry[1], entry[2]
+
+
+def resolve(node: expr, namespace: dict) -> Optional[Tuple[Callable, Optional[Dict[str, bool]] | bool]]:
+    match node:
+        case Name(id=name) if name in namespace:
+            return lookup(namespace[name])
+        case Attribute(value=Name(id=module_name), attr=name) if module_name in namespace:
+            # вызов через модуль: `other.func(...)`
+            value = getattr(namespace[module_name], name, None)
+            return None if value is None else lookup(value)
+    return None
+
+
+def symbol(func: Callable) -> str:
+    module = func.__module__.replace(".", "_").strip("_")
+    return f"{module}__{func.__name__}"
+
+
+def link(tree: Module, namespace: dict) -> Tuple[Module, Set[str]]:
+    # вызовы скомпилированных функций из других модулей заменяются вызовами их копий,
+    # которые добавляются в ту же единицу трансляции как static-функции и могут встраиваться компилятором
+    tree = copy.deepcopy(tree)
+    defined = {elem.name for elem in tree.body if isinstance(elem, FunctionDef)}
+    linked: Dict[Callable, FunctionDef] = {}
+    pending: List[Tuple[AST, dict, Set[str]]] = [(tree, namespace, defined)]
+    while pending:
+        node, node_namespace, local = pending.pop()
+        for elem in ast.walk(node):
+            if not isinstance(elem, Call) or isinstance(elem.func, Name) and elem.func.id in local:
+                continue
+            entry = resolve(elem.func, node_namespace)
+            if entry is None:
+                continue
+            func, passes = entry
+            elem.func = copy_location(Name(id=symbol(func), ctx=Load()), elem.func)
+            if func in linked:
+                continue
+            callee = optimise(ast.parse(inspect.getsource(func)), passes)
+            func_def = next(
+                stmt for stmt in callee.body if isinstance(stmt, FunctionDef) and stmt.name == func.__name__
+            )
+            func_def.name = symbol(func)
+            func_def.decorator_list = []
+            linked[func] = func_def
+            pending.append((func_def, func.__globals__, set()))
+    tree.body.extend(linked.values())
+    return tree, {func_def.name for func_def in linked.values()}
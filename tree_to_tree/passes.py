@@ -0,0 +1,512 @@
+import ast
+import copy
+import math
+from ast import *
+# импорт после `from ast import *`, где есть одноимённый базовый класс узлов операций
+import operator
+from typing import Dict, Iterable, List, Optional, Set
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+# операции, которые вычисляются при свёртке констант так же, как в сгенерированном коде
+bin_ops = {
+    Add: operator.add,
+    Sub: operator.sub,
+    Mult: operator.mul,
+    Div: operator.truediv,
+    FloorDiv: operator.floordiv,
+    Mod: operator.mod,
+    LShift: operator.lshift,
+    RShift: operator.rshift,
+    BitAnd: operator.and_,
+    BitOr: operator.or_,
+    BitXor: operator.xor
+}
+unary_ops = {
+    UAdd: operator.pos,
+    USub: operator.neg,
+    Not: operator.not_,
+    Invert: operator.invert
+}
+compare_ops = {
+    Eq: operator.eq,
+    NotEq: operator.ne,
+    Lt: operator.lt,
+    LtE: operator.le,
+    Gt: operator.gt,
+    GtE: operator.ge
+}
+
+
+def collect_types(func: FunctionDef) -> Dict[str, str]:
+    types = {}
+    for elem in ast.walk(func):
+        match elem:
+            case arg(arg=name, annotation=Name(id=type_name)) | AnnAssign(target=Name(id=name),
+                                                                          annotation=Name(id=type_name)):
+                types[name] = type_name
+            case For(target=Name(id=name), iter=Call(func=Name(id="range" | "prange"))):
+                types.setdefault(name, "int")
+    return types
+
+
+def expr_type(node: expr, types: Dict[str, str]) -> Optional[str]:
+    match node:
+        case Constant(value=bool()):
+            return "bool"
+        case Constant(value=int()):
+            return "int"
+        case Constant(value=float()):
+            return "float"
+        case Name(id=name):
+            return types.get(name)
+        case BinOp(op=Div()):
+            return "float"
+        case BinOp(left=left, right=right):
+            left_type, right_type = expr_type(left, types), expr_type(right, types)
+            if "float" in (left_type, right_type) and None not in (left_type, right_type):
+                return "float"
+            if left_type == right_type == "int":
+                return "int"
+            return None
+        case UnaryOp(op=Not()) | Compare() | BoolOp():
+            return "bool"
+        case UnaryOp(operand=operand):
+            return expr_type(operand, types)
+    return None
+
+
+def is_pure(node: AST) -> bool:
+    return not any(isinstance(elem, (Call, Subscript)) for elem in ast.walk(node))
+
+
+def stored_names(nodes: Iterable[AST]) -> Set[str]:
+    return {
+        elem.id for node in nodes for elem in ast.walk(node)
+        if isinstance(elem, Name) and isinstance(elem.ctx, Store)
+    }
+
+
+def loaded_names(nodes: Iterable[AST]) -> Set[str]:
+    res = set()
+    for node in nodes:
+        for elem in ast.walk(node):
+            match elem:
+                case Name(id=name, ctx=Load()):
+                    res.add(name)
+                case AugAssign(target=Name(id=name)):
+                    res.add(name)
+    return res
+
+
+def impure_stores(nodes: Iterable[AST]) -> Set[str]:
+    # переменные, в которые есть записи, не удаляемые DeadStoreElimination
+    res = set()
+    for node in nodes:
+        for elem in ast.walk(node):
+            match elem:
+                case Assign(targets=[Name()], value=value) | AnnAssign(target=Name(), value=value) | \
+                        AugAssign(target=Name(), value=value) if is_pure(value):
+                    pass
+                case Assign(targets=targets):
+                    res |= stored_names(targets)
+                case AnnAssign(target=target) | AugAssign(target=target) | For(target=target):
+                    res |= stored_names([target])
+    return res
+
+
+def power_of_two(node: expr) -> Optional[int]:
+    match node:
+        case Constant(value=int(value)) if not isinstance(value, bool) and value > 0 and value & (value - 1) == 0:
+            return value.bit_length() - 1
+    return None
+
+
+def non_negative_counters(func: FunctionDef) -> Set[str]:
+    # переменные, которые присваиваются только как счётчики циклов range с неотрицательным началом и шагом
+    counters, other = [], set()
+    for elem in ast.walk(func):
+        match elem:
+            case For(target=Name(id=name), iter=Call(func=Name(id="range" | "prange"), args=[_])):
+                counters.append(name)
+            case For(target=Name(id=name), iter=Call(func=Name(id="range" | "prange"), args=[start, _, *step])) \
+                    if len(step) <= 1 and all(is_non_negative(bound, set()) for bound in [start, *step]):
+                counters.append(name)
+            case For(target=target):
+                other |= stored_names([target])
+    other |= {elem.arg for elem in func.args.args}
+    stores = [elem.id for node in func.body for elem in ast.walk(node)
+              if isinstance(elem, Name) and isinstance(elem.ctx, Store)]
+    return {name for name in set(counters) - other if stores.count(name) == counters.count(name)}
+
+
+def is_non_negative(node: expr, non_negative: Set[str]) -> bool:
+    match node:
+        case Constant(value=int(value)) if not isinstance(value, bool):
+            return value >= 0
+        case Name(id=name):
+            return name in non_negative
+        case Call(func=Name(id="len"), args=[_]):
+            return True
+        case BinOp(op=BitAnd(), left=left, right=right):
+            return is_non_negative(left, non_negative) or is_non_negative(right, non_negative)
+        case BinOp(op=Add() | Mult() | FloorDiv() | Mod() | RShift() | BitOr(), left=left, right=right):
+            return is_non_negative(left, non_negative) and is_non_negative(right, non_negative)
+    return False
+
+
+def fill_empty_body(node: AST) -> None:
+    # после удаления операторов тело блока не может остаться пустым
+    if isinstance(node, (FunctionDef, While, For, If)) and not node.body:
+        node.body = [Pass()]
+
+
+class Pass(ast.NodeTransformer):
+    # проход отмечает замену узлов сам, поэтому для поиска неподвижной точки дерево не нужно сравнивать целиком
+    def __init__(self):
+        self.changed = False
+
+    def generic_visit(self, node: AST) -> AST:
+        for field, old_value in ast.iter_fields(node):
+            if isinstance(old_value, list):
+                new_values = []
+                for value in old_value:
+                    if isinstance(value, AST):
+                        new_value = self.visit(value)
+                        if new_value is not value:
+                            self.changed = True
+                        if new_value is None:
+                            continue
+                        if not isinstance(new_value, AST):
+                            new_values.extend(new_value)
+                            continue
+                        value = new_value
+                    new_values.append(value)
+                old_value[:] = new_values
+            elif isinstance(old_value, AST):
+                new_node = self.visit(old_value)
+                if new_node is not old_value:
+                    self.changed = True
+                if new_node is None:
+                    delattr(node, field)
+                else:
+                    setattr(node, field, new_node)
+        return node
+
+    def replace_block(self, node: AST, field: str, block: List[stmt]) -> None:
+        if block != getattr(node, field):
+            self.changed = True
+        setattr(node, field, block)
+
+
+class FunctionPass(Pass):
+    # проход, которому нужны типы переменных текущей функции
+    def __init__(self):
+        super().__init__()
+        self.types: Dict[str, str] = {}
+
+    def visit_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.types = collect_types(node)
+        self.generic_visit(node)
+        return node
+
+
+class ConstantFolding(Pass):
+    def visit_BinOp(self, node: BinOp) -> expr:
+        self.generic_visit(node)
+        match node:
+            case BinOp(left=Constant(value=left), right=Constant(value=right), op=op) if type(op) in bin_ops:
+                if isinstance(left, bool) or isinstance(right, bool):
+                    return node
+                # целочисленные деление и остаток в C++ округляют к нулю, а не вниз, как в Python
+                if isinstance(op, (FloorDiv, Mod)) and (left < 0 or right < 0):
+                    return node
+                if isinstance(op, (LShift, RShift)) and not 0 <= right < 31:
+                    return node
+                try:
+                    value = bin_ops[type(op)](left, right)
+                except ArithmeticError:
+                    return node
+                return fold(node, value)
+        return node
+
+    def visit_UnaryOp(self, node: UnaryOp) -> expr:
+        self.generic_visit(node)
+        match node:
+            case UnaryOp(operand=Constant(value=value), op=op) if type(op) in unary_ops:
+                if isinstance(value, bool) and not isinstance(op, Not):
+                    return node
+                return fold(node, unary_ops[type(op)](value))
+        return node
+
+    def visit_Compare(self, node: Compare) -> expr:
+        self.generic_visit(node)
+        match node:
+            case Compare(left=Constant(value=left), ops=[op], comparators=[Constant(value=right)]):
+                return fold(node, compare_ops[type(op)](left, right))
+        return node
+
+    def visit_BoolOp(self, node: BoolOp) -> expr:
+        self.generic_visit(node)
+        match node:
+            case BoolOp(op=And(), values=[Constant(value=left), Constant(value=right)]):
+                return fold(node, bool(left and right))
+            case BoolOp(op=Or(), values=[Constant(value=left), Constant(value=right)]):
+                return fold(node, bool(left or right))
+        return node
+
+
+def fold(node: expr, value) -> expr:
+    # результат, который нельзя записать литералом C++ того же типа, не сворачивается
+    if isinstance(value, float) and not math.isfinite(value):
+        return node
+    if isinstance(value, int) and not isinstance(value, bool) and not INT_MIN <= value <= INT_MAX:
+        return node
+    return ast.copy_location(Constant(value=value), node)
+
+
+def is_constant(node: expr, value, numeric_type: Optional[str]) -> bool:
+    # константа того же типа, что и второй операнд, чтобы упрощение не меняло тип выражения
+    match node:
+        case Constant(value=bool()):
+            return False
+        case Constant(value=int(const)) if numeric_type in ("int", "float"):
+            return const == value
+        case Constant(value=float(const)) if numeric_type == "float":
+            return const == value
+    return False
+
+
+class AlgebraicIdentities(FunctionPass):
+    def visit_BinOp(self, node: BinOp) -> expr:
+        self.generic_visit(node)
+        left, right = node.left, node.right
+        left_type, right_type = expr_type(left, self.types), expr_type(right, self.types)
+        zero = ast.copy_location(Constant(value=0), node)
+        match node.op:
+            # x + 0 для вещественного x не упрощается: -0.0 + 0 == 0.0
+            case Add() | BitOr() | BitXor() if left_type == "int" and is_constant(right, 0, "int"):
+                return left
+            case Add() | BitOr() | BitXor() if right_type == "int" and is_constant(left, 0, "int"):
+                return right
+            case LShift() | RShift() if left_type == "int" and is_constant(right, 0, "int"):
+                return left
+            case Sub() if is_constant(right, 0, left_type):
+                return left
+            case Sub() | BitXor() if left_type == "int" and isinstance(left, Name) and isinstance(right, Name) \
+                    and left.id == right.id:
+                return zero
+            case Mult() if is_constant(right, 1, left_type):
+                return left
+            case Mult() if is_constant(left, 1, right_type):
+                return right
+            case Mult() | BitAnd() if left_type == "int" and is_constant(right, 0, "int") and is_pure(left):
+                return zero
+            case Mult() | BitAnd() if right_type == "int" and is_constant(left, 0, "int") and is_pure(right):
+                return zero
+            case Div() if left_type == "float" and is_constant(right, 1, "float"):
+                return left
+            case FloorDiv() if left_type == "int" and is_constant(right, 1, "int"):
+                return left
+        return node
+
+
+class StrengthReduction(FunctionPass):
+    def visit_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.non_negative = non_negative_counters(node)
+        return super().visit_FunctionDef(node)
+
+    def visit_BinOp(self, node: BinOp) -> expr:
+        self.generic_visit(node)
+        left_type = expr_type(node.left, self.types)
+        right_type = expr_type(node.right, self.types)
+        # для отрицательных чисел / и % в C++ округляют к нулю, а сдвиг и маска - вниз, поэтому деление
+        # и остаток заменяются только для заведомо неотрицательного делимого
+        non_negative = is_non_negative(node.left, self.non_negative)
+        match node:
+            case BinOp(left=left, op=Mult(), right=right) if left_type == "int" and power_of_two(right):
+                return ast.copy_location(BinOp(left=left, op=LShift(), right=Constant(value=power_of_two(right))), node)
+            case BinOp(left=left, op=Mult(), right=right) if right_type == "int" and power_of_two(left):
+                return ast.copy_location(BinOp(left=right, op=LShift(), right=Constant(value=power_of_two(left))), node)
+            case BinOp(left=left, op=FloorDiv(), right=right) \
+                    if left_type == "int" and non_negative and power_of_two(right):
+                return ast.copy_location(BinOp(left=left, op=RShift(), right=Constant(value=power_of_two(right))), node)
+            case BinOp(left=left, op=Mod(), right=Constant(value=int(value))) \
+                    if left_type == "int" and non_negative and power_of_two(node.right) is not None:
+                return ast.copy_location(BinOp(left=left, op=BitAnd(), right=Constant(value=value - 1)), node)
+            case BinOp(left=left, op=Div(), right=Constant(value=int(value) | float(value))) \
+                    if left_type in ("int", "float") and not isinstance(value, bool) and value != 0 \
+                    and math.frexp(value)[0] in (0.5, -0.5):
+                return ast.copy_location(BinOp(left=left, op=Mult(), right=Constant(value=1 / value)), node)
+        return node
+
+
+class DeadBranchElimination(Pass):
+    def visit_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.generic_visit(node)
+        self.replace_block(node, "body", self.dump_block(node.body))
+        fill_empty_body(node)
+        return node
+
+    def generic_visit(self, node: AST) -> AST:
+        super().generic_visit(node)
+        if not isinstance(node, (FunctionDef, Module)):
+            for field in ("body", "orelse"):
+                block = getattr(node, field, None)
+                if isinstance(block, list):
+                    self.replace_block(node, field, self.dump_block(block))
+        fill_empty_body(node)
+        return node
+
+    def dump_block(self, nodes: List[stmt]) -> List[stmt]:
+        res = []
+        for node in nodes:
+            match node:
+                case While(test=Constant(value=test)) if not test:
+                    continue
+                case If(test=Constant(value=test), body=body, orelse=orelse):
+                    branch = body if test else orelse
+                    # объявления из ветки остаются в своей области видимости C++
+                    if any(isinstance(elem, AnnAssign) for elem in branch):
+                        if not test or node.orelse:
+                            self.changed = True
+                            node.test, node.body, node.orelse = Constant(value=True), branch, []
+                        res.append(node)
+                    else:
+                        res.extend(branch)
+                    continue
+            res.append(node)
+            # код после return, break и continue недостижим
+            if isinstance(node, (Return, Break, Continue)):
+                break
+        return res
+
+
+class DeadStoreElimination(Pass):
+    def visit_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        # удаление одной записи может сделать мёртвыми переменные, которые она читала
+        changed = self.changed
+        while True:
+            self.dead = stored_names(node.body) - loaded_names(node.body)
+            # объявление удаляется, только если удаляются и все остальные записи в переменную
+            self.removable = self.dead - impure_stores(node.body)
+            self.changed = False
+            self.generic_visit(node)
+            if not self.changed:
+                self.changed = changed
+                return node
+            changed = True
+
+    def generic_visit(self, node: AST) -> AST:
+        super().generic_visit(node)
+        fill_empty_body(node)
+        return node
+
+    def visit_Assign(self, node: Assign) -> Optional[stmt]:
+        match node:
+            case Assign(targets=[Name(id=target)], value=Name(id=value)) if target == value:
+                return None
+            case Assign(targets=[Name(id=target)]) if target in self.dead and is_pure(node.value):
+                return None
+        return node
+
+    def visit_AnnAssign(self, node: AnnAssign) -> Optional[stmt]:
+        match node:
+            case AnnAssign(target=Name(id=target)) if target in self.removable and is_pure(node.value):
+                return None
+        return node
+
+    def visit_AugAssign(self, node: AugAssign) -> Optional[stmt]:
+        match node:
+            case AugAssign(target=Name(id=target)) if target in self.dead and is_pure(node.value):
+                return None
+        return node
+
+
+class LoopInvariantHoisting(Pass):
+    def visit_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        # переменная выносится из цикла, только если во всей функции она объявлена один раз
+        declarations = [elem.target.id for elem in ast.walk(node)
+                        if isinstance(elem, AnnAssign) and isinstance(elem.target, Name)]
+        params = {elem.arg for elem in node.args.args}
+        self.unique = {name for name in declarations if declarations.count(name) == 1 and name not in params}
+        self.generic_visit(node)
+        return node
+
+    def generic_visit(self, node: AST) -> AST:
+        super().generic_visit(node)
+        for field in ("body", "orelse"):
+            block = getattr(node, field, None)
+            if isinstance(block, list) and block and isinstance(block[0], stmt):
+                self.replace_block(node, field, self.hoist_block(block))
+        return node
+
+    def hoist_block(self, nodes: List[stmt]) -> List[stmt]:
+        res = []
+        for node in nodes:
+            if isinstance(node, (While, For)):
+                res.extend(self.hoist(node))
+            res.append(node)
+        return res
+
+    def hoist(self, loop: While | For) -> List[stmt]:
+        stored = stored_names(loop.body) | stored_names([loop.target] if isinstance(loop, For) else [])
+        hoisted = []
+        for node in loop.body:
+            match node:
+                case AnnAssign(target=Name(id=target), value=value) if target in self.unique and is_pure(value):
+                    if stored_names([value]) or loaded_names([value]) & stored:
+                        continue
+                    # целочисленное деление на ноль нельзя выполнять до цикла, который может не выполниться
+                    if any(isinstance(elem, (Div, FloorDiv, Mod)) for elem in ast.walk(value)):
+                        continue
+                    stores = [elem for elem in ast.walk(loop) if isinstance(elem, Name)
+                              and isinstance(elem.ctx, Store) and elem.id == target]
+                    if len(stores) == 1:
+                        hoisted.append(node)
+        if hoisted:
+            loop.body = [node for node in loop.body if node not in hoisted]
+            fill_empty_body(loop)
+        return hoisted
+
+
+# проходы в порядке выполнения
+PASSES = {
+    "constant_folding": ConstantFolding,
+    "algebraic_identities": AlgebraicIdentities,
+    "strength_reduction": StrengthReduction,
+    "dead_branch_elimination": DeadBranchElimination,
+    "dead_store_elimination": DeadStoreElimination,
+    "loop_invariant_hoisting": LoopInvariantHoisting
+}
+
+
+class PassManager:
+    def __init__(self, passes: Optional[Dict[str, bool]] = None, max_iterations: int = 4):
+        enabled = dict.fromkeys(PASSES, True)
+        for name, value in (passes or {}).items():
+            if name not in PASSES:
+                raise Exception(f"unknown optimisation pass {name}")
+            enabled[name] = value
+        self.passes = [PASSES[name] for name, value in enabled.items() if value]
+        self.max_iterations = max_iterations
+
+    def run(self, tree: Module) -> Module:
+        tree = copy.deepcopy(tree)
+        # неподвижная точка достигнута, когда все проходы подряд ничего не изменили: круг может закончиться
+        # посередине, если после последнего изменения проходы в начале списка уже отработали впустую
+        unchanged = 0
+        for _ in range(self.max_iterations):
+            for optimisation in self.passes:
+                transformer = optimisation()
+                tree = transformer.visit(tree)
+                unchanged = 0 if transformer.changed else unchanged + 1
+                if unchanged == len(self.passes):
+                    return ast.fix_missing_locations(tree)
+        return ast.fix_missing_locations(tree)
+
+
+def optimise(tree: Module, passes: Optional[Dict[str, bool]] | bool = None) -> Module:
+    if passes is False:
+        return tree
+    return PassManager(None if passes is True else passes).run(tree)